@@ -19,6 +19,26 @@ def create_app(config_class=Config):
     # Import models so migration script detects them
     from app import models
 
+    from app.data_version import init_data_version
+    init_data_version(app)
+
+    from app.cache import init_cache, init_fragment_cache, init_http_caching
+    init_cache(app)
+    init_fragment_cache(app)
+    init_http_caching(app)
+
+    from app.snapshot import init_snapshot
+    init_snapshot(app)
+
+    from app.training import init_training_index
+    init_training_index(app)
+
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from app.refresh import init_refresh
+    init_refresh(app)
+
     # Register Blueprints
     from app.main import bp as main_bp
     app.register_blueprint(main_bp)
@@ -0,0 +1,73 @@
+import heapq
+import numpy as np
+from app.cache import memoize_per_data_version
+from app.org_units import HIERARCHY_LEVELS, get_scope_units
+from app.proficiency import priority_label
+from app.snapshot import get_snapshot
+
+# Skills shown in the "top problem skills" report tables
+TOP_SKILLS = 10
+
+
+def _gap_rate(gaps, holders):
+    """Share of the people holding a skill who are under target on it, as a whole percent."""
+    return round(gaps / holders * 100) if holders else 0
+
+
+@memoize_per_data_version()
+def get_skill_stats(level, name):
+    """
+    Gap totals per skill for everyone under a scope, aggregated over the
+    skills snapshot: holders, current/future gap counts, gap rate, average
+    severity of the current gaps and how many of them are high priority.
+    Sorted by skill name.
+    """
+    snapshot = get_snapshot()
+    totals = snapshot.skill_totals(snapshot.scope_employees(get_scope_units(level, name)))
+
+    stats = []
+    for code in np.flatnonzero(totals['holders']):
+        holders, current_gaps = int(totals['holders'][code]), int(totals['current_gaps'][code])
+        avg_severity = int(totals['severity'][code]) / current_gaps if current_gaps else None
+        stats.append({
+            'skill_name': str(snapshot.skill_names[code]),
+            'holders': holders,
+            'current_gaps': current_gaps,
+            'future_gaps': int(totals['future_gaps'][code]),
+            'gap_rate': _gap_rate(current_gaps, holders),
+            'avg_severity': round(avg_severity or 0, 2),
+            'high_priority_gaps': int(totals['high_priority_gaps'][code]),
+            'priority': priority_label(avg_severity),
+        })
+    return stats
+
+
+def get_top_problem_skills(level, name, k=TOP_SKILLS):
+    """
+    The k skills with the most current gaps under a scope; ties go to the
+    higher average severity, then the higher gap rate. On-target skills are left out.
+    """
+    with_gaps = [skill for skill in get_skill_stats(level, name) if skill['current_gaps']]
+    return heapq.nlargest(k, with_gaps, key=lambda skill: (
+        skill['current_gaps'], skill['avg_severity'], skill['gap_rate']))
+
+
+@memoize_per_data_version()
+def get_skill_comparison(level, name, skill_names):
+    """
+    Gap rate of each given skill across the units directly below a scope
+    (DLs under a DH, DHs under a GDL, ...), from one pass over the skills
+    snapshot. skill_names must be a tuple; skills a unit nobody holds read as None.
+    """
+    depth = HIERARCHY_LEVELS.index(level)
+    if depth + 1 == len(HIERARCHY_LEVELS) or not skill_names:
+        return []
+
+    snapshot = get_snapshot()
+    children = snapshot.child_skill_totals(snapshot.scope_employees(get_scope_units(level, name)),
+                                           HIERARCHY_LEVELS[depth + 1], skill_names)
+
+    return [{'name': child_name,
+             'gap_rates': [_gap_rate(int(gaps), int(holders)) if holders else None
+                           for holders, gaps in zip(*children[child_name])]}
+            for child_name in sorted(children)]
@@ -0,0 +1,321 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, request, make_response
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from app.data_version import get_data_version, recent_data_version
+
+
+class NullCache:
+    """Backend that stores nothing; every lookup is a miss."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LocalCache:
+    """
+    In-process LRU cache bounded by entry count and total body size.
+    Each worker process keeps its own copy.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(value[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = value
+            self._bytes += size
+            # Evict least recently used entries until both bounds hold
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class FileSystemCache:
+    """
+    Cache shared by every worker on the host: one pickle file per entry.
+    Reads touch the file, so eviction by oldest mtime is LRU.
+    """
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value if stored_key == key else None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def init_cache(app):
+    """Create the response cache backend configured by RESPONSE_CACHE_TYPE."""
+    cache_type = app.config['RESPONSE_CACHE_TYPE']
+    if cache_type == 'local':
+        backend = LocalCache(app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+                             app.config['RESPONSE_CACHE_MAX_BYTES'])
+    elif cache_type == 'filesystem':
+        backend = FileSystemCache(app.config['RESPONSE_CACHE_DIR'],
+                                  app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+    elif cache_type == 'null':
+        backend = NullCache()
+    else:
+        raise ValueError(f"Unknown RESPONSE_CACHE_TYPE: {cache_type}")
+    app.extensions['response_cache'] = backend
+
+
+def get_cache():
+    return current_app.extensions['response_cache']
+
+
+def cached_view(view):
+    """
+    Serve a GET view from the response cache.
+    The key is (endpoint, query args, data version): scope names and filters
+    travel in the query string, and an import bumps the data version, so
+    stale pages are never served and simply age out of the cache.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+
+        key = (request.endpoint, tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))), get_data_version())
+        cache = get_cache()
+
+        cached = cache.get(key)
+        if cached is not None:
+            body, mimetype = cached
+            response = make_response(body)
+            response.mimetype = mimetype
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            cache.set(key, (response.get_data(), response.mimetype))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def _code_stamp(app):
+    """Newest modification time of the app's code and templates, so a deploy changes every ETag."""
+    newest = 0
+    for folder in (app.root_path, os.path.join(app.root_path, app.template_folder)):
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.endswith(('.py', '.html')):
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return datetime.fromtimestamp(int(newest), timezone.utc)
+
+
+def init_http_caching(app):
+    """
+    Stamp the running code for conditional GETs, and version static URLs
+    with the file's mtime (?v=...) so SEND_FILE_MAX_AGE_DEFAULT can be long.
+    """
+    app.extensions['code_stamp'] = _code_stamp(app)
+
+    @app.url_defaults
+    def static_version(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            try:
+                values['v'] = int(os.path.getmtime(os.path.join(app.static_folder, values['filename'])))
+            except OSError:
+                pass
+
+
+def _validators():
+    """
+    ETag and Last-Modified of the requested page: its endpoint and scope
+    (view and query args) at the data version this process last read.
+    """
+    version, updated_at = recent_data_version()
+    code_stamp = current_app.extensions['code_stamp']
+    key = (request.endpoint, tuple(sorted(request.view_args.items())),
+           tuple(sorted(request.args.items(multi=True))), version, code_stamp.timestamp())
+    last_modified = max(code_stamp, updated_at.replace(tzinfo=timezone.utc, microsecond=0)) if updated_at else code_stamp
+    return hashlib.sha1(repr(key).encode()).hexdigest(), last_modified
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Browsers keep the page but revalidate it on every load
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+
+
+def conditional_get(bp):
+    """
+    ETag/Last-Modified on every GET view of a blueprint. A request whose
+    validators still match is answered 304 before the view runs, so no
+    query or template render happens (nor any database read while this
+    process's data version read is fresh; see DATA_VERSION_TTL).
+    """
+    @bp.before_request
+    def not_modified():
+        if request.method != 'GET' or not (request.if_none_match or request.if_modified_since):
+            return None
+
+        etag, last_modified = _validators()
+        # If-None-Match wins when both are sent
+        if request.if_none_match:
+            fresh = request.if_none_match.contains(etag)
+        else:
+            fresh = request.if_modified_since >= last_modified
+        if not fresh:
+            return None
+
+        response = current_app.response_class(status=304)
+        _set_validators(response, etag, last_modified)
+        return response
+
+    @bp.after_request
+    def add_validators(response):
+        if request.method == 'GET' and response.status_code == 200:
+            _set_validators(response, *_validators())
+        return response
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache 'name', unit.id %}...{% endcache %}: the block is rendered once
+    per (template, arguments, data version) and then served from the
+    fragment cache. The arguments must identify everything the block
+    depends on, since the surrounding context is not part of the key.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache', [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _cache(self, key, caller):
+        # The view read the data version earlier in this request, so this does not query
+        key = (tuple(key), recent_data_version()[0])
+        cache = current_app.extensions['fragment_cache']
+        cached = cache.get(key)
+        if cached is not None:
+            return Markup(cached[0])
+
+        fragment = caller()
+        cache.set(key, (str(fragment),))
+        return Markup(fragment)
+
+
+def init_fragment_cache(app):
+    """Per-process LRU of rendered template fragments, and the {% cache %} tag that fills it."""
+    app.extensions['fragment_cache'] = LocalCache(app.config['FRAGMENT_CACHE_MAX_ENTRIES'],
+                                                  app.config['FRAGMENT_CACHE_MAX_BYTES'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+
+def memoize_per_data_version(maxsize=128):
+    """
+    In-process LRU memo for a function of hashable arguments, keyed by the
+    arguments and the data version, so an import invalidates every entry.
+    Callers share the returned objects and must not modify them.
+    """
+    def decorator(func):
+        entries = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            key = (args, get_data_version())
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+
+            value = func(*args)
+            with lock:
+                entries[key] = value
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
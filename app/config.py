@@ -6,3 +6,42 @@ class Config:
     basedir = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(basedir, '../myisp.db'))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Rows per chunk when streaming skills CSVs into the database
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+    # Rendered dashboard/report pages, keyed by data version: local (per-process LRU),
+    # filesystem (shared by workers on the host) or null (disabled)
+    RESPONSE_CACHE_TYPE = os.environ.get('RESPONSE_CACHE_TYPE', 'local')
+    RESPONSE_CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR', os.path.join(basedir, '../.cache/responses'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    # Rendered {% cache %} blocks of the dashboards (one per org unit), per process
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 4096))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    # Role pages answer conditional GETs (ETag/Last-Modified) from the data version this
+    # process last read, trusted for DATA_VERSION_TTL seconds without querying the database
+    DATA_VERSION_TTL = float(os.environ.get('DATA_VERSION_TTL', 5))
+    # Browser cache lifetime of static files; their URLs carry the file's mtime, so edits still show up
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.environ.get('STATIC_MAX_AGE', 365 * 24 * 3600))
+    # Nightly refresh: CSVs dropped in REFRESH_DROP_DIR are parsed by REFRESH_WORKERS processes
+    # and loaded by `flask refresh`, or daily at REFRESH_TIME (local HH:MM) by an in-process
+    # scheduler when REFRESH_SCHEDULER is set
+    REFRESH_DROP_DIR = os.environ.get('REFRESH_DROP_DIR', os.path.join(basedir, '../data/incoming'))
+    REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', 4))
+    REFRESH_TIME = os.environ.get('REFRESH_TIME', '02:00')
+    REFRESH_SCHEDULER = os.environ.get('REFRESH_SCHEDULER', '0') == '1'
+    # Columnar skills snapshot used for aggregates: when set, each import persists it
+    # here as .npy files that every worker memory-maps instead of rebuilding its own
+    SKILL_SNAPSHOT_DIR = os.environ.get('SKILL_SNAPSHOT_DIR') or None
+    # Per-request SQL statement counts and DB time (X-SQL-* headers, /debug/queries)
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1') == '1'
+    SQL_DEBUG_ENDPOINT = os.environ.get('SQL_DEBUG_ENDPOINT', '0') == '1'
+    SQL_RECENT_REQUESTS = int(os.environ.get('SQL_RECENT_REQUESTS', 50))
+    # A statement shape repeated more often than this in one request is a likely N+1:
+    # logged as a warning, or raised as RepeatedQueryError when SQL_REPEAT_RAISE is set
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD', 10))
+    SQL_REPEAT_RAISE = os.environ.get('SQL_REPEAT_RAISE', '0') == '1'
+    # Background jobs (PDF renders): worker processes, where outputs are kept,
+    # and how long a queued/running job may go before it is considered lost
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_ARTIFACT_DIR = os.environ.get('JOB_ARTIFACT_DIR', os.path.join(basedir, '../.cache/artifacts'))
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 600))
@@ -0,0 +1,68 @@
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update
+from app import db
+from app.models import DataVersion
+
+# The counter lives in a single row with this id
+DATA_VERSION_ID = 1
+
+
+def init_data_version(app):
+    """Per-process record of the last data version read, for checks that must not query (see recent_data_version)."""
+    app.extensions['data_version'] = {'version': None, 'updated_at': None, 'read_at': 0.0,
+                                      'lock': threading.Lock()}
+
+
+def _read_data_version():
+    row = db.session.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.id == DATA_VERSION_ID)
+    ).first()
+    version, updated_at = (row.version or 0, row.updated_at) if row else (0, None)
+    holder = current_app.extensions['data_version']
+    with holder['lock']:
+        holder.update(version=version, updated_at=updated_at, read_at=time.monotonic())
+    return version, updated_at
+
+
+def get_data_version():
+    """Current data version (0 before the first import)."""
+    return _read_data_version()[0]
+
+
+def recent_data_version():
+    """
+    (version, updated_at) as this process last read it, re-read only when
+    that was more than DATA_VERSION_TTL seconds ago. Every get_data_version
+    call refreshes it, so it lags another process's import by at most the TTL.
+    """
+    holder = current_app.extensions['data_version']
+    with holder['lock']:
+        if holder['version'] is not None and \
+                time.monotonic() - holder['read_at'] <= current_app.config['DATA_VERSION_TTL']:
+            return holder['version'], holder['updated_at']
+    return _read_data_version()
+
+
+def advance_data_version():
+    """
+    Advance the data version inside the current transaction and return the
+    new value. Nothing is committed: readers see it when the caller commits.
+    """
+    table = DataVersion.__table__
+    result = db.session.execute(
+        update(table).where(table.c.id == DATA_VERSION_ID)
+        .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if not result.rowcount:
+        db.session.add(DataVersion(id=DATA_VERSION_ID, version=1, updated_at=datetime.utcnow()))
+    return db.session.execute(select(table.c.version).where(table.c.id == DATA_VERSION_ID)).scalar()
+
+
+def bump_data_version():
+    """Advance the data version so everything cached against the old one goes stale."""
+    advance_data_version()
+    db.session.commit()
+    return get_data_version()
@@ -1,5 +1,7 @@
 from flask import Blueprint
+from app.cache import conditional_get
 
 bp = Blueprint('delivery_head', __name__, url_prefix='/delivery-head')
+conditional_get(bp)
 
 from app.delivery_head import routes
@@ -1,42 +1,46 @@
-from flask import render_template, request
+from flask import render_template, request, jsonify, abort
 from app.delivery_head import bp
-from app.utils import get_dls_by_dh, get_managers_by_dl, get_employees_by_manager, get_employee_summary, get_employee_details_context
-from app.models import Employee
+from app import db
+from app.hierarchy import get_child_nodes, get_unit_children
+from app.models import OrgUnit
+from app.org_units import get_scope_units
+from app.utils import get_employee_details_context
+from app.rollups import get_rollup, gap_percentage
+from app.trends import get_trend_series
+from app.analytics import get_top_problem_skills, get_skill_comparison
+from app.importer import import_uploaded_file
+from app.cache import cached_view
+from app.exports import scope_csv_response
+from app.jobs import submit_job, job_status
+from app.search import search_people
 
 @bp.route('/dashboard')
+@cached_view
 def dashboard():
     """Delivery head dashboard showing full hierarchy."""
     dh_name = request.args.get('dh', 'Jessica Pearson')
 
-    # Get DLs under this DH
-    dl_names = get_dls_by_dh(dh_name)
-
-    dls_data = []
-    for dl in dl_names:
-        # Get managers under this DL
-        manager_names = get_managers_by_dl(dl)
-        managers_data = []
-
-        for mgr in manager_names:
-            emp_list = get_employees_by_manager(mgr)
-            employees_summary = get_employee_summary(emp_list)
-
-            managers_data.append({
-                'name': mgr,
-                'employees': employees_summary,
-                'total_reports': len(employees_summary)
-            })
-
-        dls_data.append({
-            'name': dl,
-            'managers': managers_data,
-            'total_managers': len(managers_data),
-            'total_employees': sum(m['total_reports'] for m in managers_data)
-        })
+    # Only the DLs with their totals; managers and teams load when a DL is expanded
+    dls_data = get_child_nodes(get_scope_units('dh', dh_name))
 
     return render_template('delivery_head/dashboard.html',
                          dh_name=dh_name,
-                         dls=dls_data)
+                         dls=dls_data,
+                         gap_pct=gap_percentage(get_rollup('dh', dh_name)))
+
+@bp.route('/org-units/<int:unit_id>/children')
+@cached_view
+def unit_children(unit_id):
+    """One level of the org tree below a unit, fetched when a dashboard accordion opens."""
+    unit = db.session.get(OrgUnit, unit_id) or abort(404)
+    return jsonify(get_unit_children(unit))
+
+@bp.route('/search')
+def search():
+    """Ranked people search within the delivery head's org, for the Smart Filter Bar."""
+    dh_name = request.args.get('dh', 'Jessica Pearson')
+    query = request.args.get('q', '')
+    return jsonify(query=query, results=search_people(query, units=get_scope_units('dh', dh_name)))
 
 @bp.route('/employee/<nbk>')
 def employee_details(nbk):
@@ -50,20 +54,50 @@ def employee_details(nbk):
                          **context)
 
 @bp.route('/reports')
+@cached_view
 def reports():
     """Delivery head reports view."""
     dh_name = request.args.get('dh', 'Jessica Pearson')
     
-    total_employees = Employee.query.filter_by(dh_name=dh_name).count()
+    # Monthly points over the last year unless weekly ones are asked for
+    trend_period = 'week' if request.args.get('trend') == 'week' else 'month'
+
+    rollup = get_rollup('dh', dh_name)
+
+    top_skills = get_top_problem_skills('dh', dh_name)
+    comparison = get_skill_comparison('dh', dh_name, tuple(skill['skill_name'] for skill in top_skills))
 
     return render_template('delivery_head/reports.html',
                          dh_name=dh_name,
-                         total_employees=total_employees)
+                         total_employees=rollup['headcount'],
+                         gap_pct=gap_percentage(rollup),
+                         rollup=rollup,
+                         trend=get_trend_series('dh', dh_name, trend_period),
+                         trend_period=trend_period,
+                         top_skills=top_skills,
+                         comparison=comparison)
+
+@bp.route('/reports/export.csv')
+def export_csv():
+    """Delivery head report data as a streaming CSV download."""
+    dh_name = request.args.get('dh', 'Jessica Pearson')
+    return scope_csv_response('Delivery Head', 'dh', dh_name)
 
-@bp.route('/import-data')
+@bp.route('/reports/export.pdf', methods=['POST'])
+def export_pdf():
+    """Queue a PDF render of the delivery head report; the page polls the returned job."""
+    dh_name = request.args.get('dh', 'Jessica Pearson')
+    job = submit_job('report_pdf', 'dh', dh_name)
+    return jsonify(job_status(job)), 200 if job.status == 'Done' else 202
+
+@bp.route('/import-data', methods=['GET', 'POST'])
 def import_data():
-    """Delivery head data import view."""
-    return render_template('delivery_head/import_data.html')
+    """Delivery head data import view; POST streams the uploaded CSV into the database."""
+    import_log = None
+    if request.method == 'POST':
+        import_log = import_uploaded_file(request.files.get('file'), imported_by='Delivery Head')
+
+    return render_template('delivery_head/import_data.html', import_log=import_log)
 
 @bp.route('/settings')
 def settings():
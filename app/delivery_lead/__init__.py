@@ -1,5 +1,7 @@
 from flask import Blueprint
+from app.cache import conditional_get
 
 bp = Blueprint('delivery_lead', __name__, url_prefix='/delivery-lead')
+conditional_get(bp)
 
 from app.delivery_lead import routes
@@ -1,30 +1,25 @@
-from flask import render_template, request
+from flask import render_template, request, jsonify
 from app.delivery_lead import bp
-from app.utils import get_managers_by_dl, get_employees_by_manager, get_employee_summary, get_employee_details_context
-from app.models import Employee, Skill
+from app.hierarchy import build_hierarchy
+from app.org_units import get_scope_units
+from app.utils import get_employee_details_context
+from app.rollups import get_rollup, gap_percentage
+from app.trends import get_trend_series
+from app.importer import import_uploaded_file
+from app.cache import cached_view
+from app.exports import scope_csv_response
+from app.jobs import submit_job, job_status
+from app.search import search_people
 
 @bp.route('/dashboard')
+@cached_view
 def dashboard():
     """Delivery lead dashboard showing managers and their teams."""
     dl_name = request.args.get('dl', 'Robert Zane')
 
-    # Get all managers under this DL
-    manager_names = get_managers_by_dl(dl_name)
-
-    # Build hierarchical data
-    managers_data = []
-    for mgr in manager_names:
-        emp_list = get_employees_by_manager(mgr)
-        employees_summary = get_employee_summary(emp_list)
-
-        managers_data.append({
-            'name': mgr,
-            'nbk': emp_list[0].nbk if emp_list else '',
-            'role': emp_list[0].role if emp_list else '',
-            'employees': employees_summary,
-            'total_reports': len(employees_summary),
-            'total_gaps': sum(e['current_gaps'] for e in employees_summary)
-        })
+    # Managers and their teams, with report and gap totals per manager
+    managers_data = build_hierarchy('dl', dl_name)
+    manager_names = [m['name'] for m in managers_data]
 
     # Apply filters
     manager_filter = request.args.get('manager', '')
@@ -39,6 +34,13 @@ def dashboard():
                          managers=managers_data,
                          all_managers=manager_names)
 
+@bp.route('/search')
+def search():
+    """Ranked people search within the delivery lead's org, for the Smart Filter Bar."""
+    dl_name = request.args.get('dl', 'Robert Zane')
+    query = request.args.get('q', '')
+    return jsonify(query=query, results=search_people(query, units=get_scope_units('dl', dl_name)))
+
 @bp.route('/employee/<nbk>')
 def employee_details(nbk):
     """Employee details view for delivery lead."""
@@ -51,26 +53,48 @@ def employee_details(nbk):
                          **context)
 
 @bp.route('/reports')
+@cached_view
 def reports():
     """Delivery lead reports view."""
     dl_name = request.args.get('dl', 'Robert Zane')
     
-    employees = Employee.query.filter_by(dl_name=dl_name).all()
-    total_employees = len(employees)
-    
-    total_skills = Skill.query.join(Employee).filter(Employee.dl_name == dl_name).count()
-    current_gaps = Skill.query.join(Employee).filter(Employee.dl_name == dl_name, Skill.gap_current == 'Under-Skilled').count()
+    # Monthly points over the last year unless weekly ones are asked for
+    trend_period = 'week' if request.args.get('trend') == 'week' else 'month'
+
+    # Totals are precomputed at import time (see app.rollups)
+    rollup = get_rollup('dl', dl_name)
 
     return render_template('delivery_lead/reports.html',
                          dl_name=dl_name,
-                         total_employees=total_employees,
-                         total_skills=total_skills,
-                         current_gaps=current_gaps)
+                         total_employees=rollup['headcount'],
+                         total_skills=rollup['total_skills'],
+                         current_gaps=rollup['current_gaps'],
+                         gap_pct=gap_percentage(rollup),
+                         rollup=rollup,
+                         trend=get_trend_series('dl', dl_name, trend_period),
+                         trend_period=trend_period)
 
-@bp.route('/import-data')
+@bp.route('/reports/export.csv')
+def export_csv():
+    """Delivery lead report data as a streaming CSV download."""
+    dl_name = request.args.get('dl', 'Robert Zane')
+    return scope_csv_response('Delivery Lead', 'dl', dl_name)
+
+@bp.route('/reports/export.pdf', methods=['POST'])
+def export_pdf():
+    """Queue a PDF render of the delivery lead report; the page polls the returned job."""
+    dl_name = request.args.get('dl', 'Robert Zane')
+    job = submit_job('report_pdf', 'dl', dl_name)
+    return jsonify(job_status(job)), 200 if job.status == 'Done' else 202
+
+@bp.route('/import-data', methods=['GET', 'POST'])
 def import_data():
-    """Delivery lead data import view."""
-    return render_template('delivery_lead/import_data.html')
+    """Delivery lead data import view; POST streams the uploaded CSV into the database."""
+    import_log = None
+    if request.method == 'POST':
+        import_log = import_uploaded_file(request.files.get('file'), imported_by='Delivery Lead')
+
+    return render_template('delivery_lead/import_data.html', import_log=import_log)
 
 @bp.route('/settings')
 def settings():
@@ -1,5 +1,7 @@
 from flask import Blueprint
+from app.cache import conditional_get
 
 bp = Blueprint('employee', __name__, url_prefix='/employee')
+conditional_get(bp)
 
 from app.employee import routes
@@ -1,6 +1,7 @@
 from flask import render_template, request
 from app.employee import bp
 from app.models import Employee, Skill
+from app.training import get_upskill_plan
 
 def get_employee_dict(emp):
     """Helper to map Employee object to dict with capitalized keys for templates."""
@@ -27,7 +28,7 @@ def dashboard():
         return render_template('errors/404.html'), 404
 
     emp_dict = get_employee_dict(emp)
-    skills_query = Skill.query.filter_by(employee_nbk=nbk).all()
+    skills_query = Skill.query.filter_by(employee_nbk=nbk).order_by(Skill.id).all()
     
     skills = []
     current_gaps = 0
@@ -73,38 +74,8 @@ def upskill_plan():
     if not emp:
         return render_template('errors/404.html'), 404
 
-    skills_query = Skill.query.filter_by(employee_nbk=nbk).all()
-
-    gap_skills = []
-    future_gap_skills = []
-    
-    # Track names to avoid duplicates if logic requires, though usually gap_future check excludes current gaps
-    # The original logic was:
-    # future_with_gaps = emp_df[
-    #    (emp_df['GAP-Future'] == 'Under-Skilled') &
-    #    (~emp_df['SkillName'].isin(current_gap_names))
-    # ]
-    
-    current_gap_names = set()
-
-    # First pass for current gaps
-    for skill in skills_query:
-        if skill.gap_current == 'Under-Skilled':
-            gap_skills.append({
-                'name': skill.skill_name,
-                'current': skill.user_proficiency,
-                'target': skill.expected_current_prof
-            })
-            current_gap_names.add(skill.skill_name)
-
-    # Second pass for future gaps
-    for skill in skills_query:
-        if skill.gap_future == 'Under-Skilled' and skill.skill_name not in current_gap_names:
-            future_gap_skills.append({
-                'name': skill.skill_name,
-                'current': skill.user_proficiency,
-                'target': skill.expected_future_prof
-            })
+    # Gap skills with the catalogue tier that fits each gap (see app.training)
+    gap_skills, future_gap_skills = get_upskill_plan(nbk)
 
     return render_template('employee/upskill_plan.html',
                          employee=get_employee_dict(emp),
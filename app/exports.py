@@ -0,0 +1,81 @@
+import csv
+import io
+import re
+from datetime import datetime
+from flask import Response, stream_with_context
+from sqlalchemy import select
+from app import db
+from app.models import Employee, Skill, DataVersion
+from app.org_units import LEVEL_COLUMNS
+
+# CSV header -> column, in the same layout as the import file
+EXPORT_COLUMNS = [
+    ('Name', Employee.name),
+    ('NBK', Employee.nbk),
+    ('Email', Employee.email),
+    ('GDLName', Employee.gdl_name),
+    ('DHName', Employee.dh_name),
+    ('DLName', Employee.dl_name),
+    ('MgrName', Employee.manager_name),
+    ('FunctionName', Employee.function_name),
+    ('Role', Employee.role),
+    ('PM/IC', Employee.pm_ic),
+    ('SkillName', Skill.skill_name),
+    ('SkillType', Skill.skill_type),
+    ('EmpSkillCategory', Skill.emp_skill_category),
+    ('User Proficiency', Skill.user_proficiency),
+    ('Expected Current Prof', Skill.expected_current_prof),
+    ('GAP-Current', Skill.gap_current),
+    ('Expected Future Prof', Skill.expected_future_prof),
+    ('GAP-Future', Skill.gap_future),
+]
+
+# Rows fetched from the cursor, and written out, per batch
+EXPORT_BATCH_SIZE = 2000
+
+
+def _metadata_rows(role_label, level, name, generated_by):
+    """Scope/date range/generated-by/timestamp lines the PRD requires on every export."""
+    last_import = db.session.execute(select(DataVersion.updated_at)).scalar()
+    return [
+        ['# Scope', f'{role_label} ({LEVEL_COLUMNS[level].key} = {name})'],
+        ['# Date Range', f"All records up to {last_import:%Y-%m-%d %H:%M} UTC" if last_import
+         else 'All records'],
+        ['# Generated By', generated_by],
+        ['# Generated At', f'{datetime.utcnow():%Y-%m-%d %H:%M:%S} UTC'],
+    ]
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def generate_scope_csv(role_label, level, name, generated_by):
+    """
+    Yield a scope's raw skill rows as CSV text, metadata and header first.
+    Rows come off a streaming cursor (yield_per) in fixed-size batches, so
+    memory stays flat however large the scope is.
+    """
+    yield _csv_chunk(_metadata_rows(role_label, level, name, generated_by)
+                     + [[header for header, _ in EXPORT_COLUMNS]])
+
+    stmt = (
+        select(*[column for _, column in EXPORT_COLUMNS])
+        .join(Skill, Skill.employee_nbk == Employee.nbk)
+        .where(LEVEL_COLUMNS[level] == name)
+        .order_by(Employee.nbk, Skill.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for batch in db.session.execute(stmt).partitions():
+        yield _csv_chunk(batch)
+
+
+def scope_csv_response(role_label, level, name, generated_by=None):
+    """Streaming text/csv download of a scope's report data."""
+    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')
+    filename = f"skill_gaps_{level}_{safe_name}_{datetime.utcnow():%Y%m%d}.csv"
+    rows = generate_scope_csv(role_label, level, name, generated_by or name)
+    return Response(stream_with_context(rows), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
@@ -1,5 +1,7 @@
 from flask import Blueprint
+from app.cache import conditional_get
 
 bp = Blueprint('group_delivery_lead', __name__, url_prefix='/group-delivery-lead')
+conditional_get(bp)
 
 from app.group_delivery_lead import routes
@@ -1,45 +1,46 @@
-from flask import render_template, request
+from flask import render_template, request, jsonify, abort
 from app.group_delivery_lead import bp
-from app.utils import get_dhs_by_gdl, get_dls_by_dh, get_managers_by_dl, get_employees_by_manager, get_employee_summary, get_employee_details_context
+from app import db
+from app.hierarchy import get_child_nodes, get_unit_children
+from app.models import OrgUnit
+from app.org_units import get_scope_units
+from app.utils import get_employee_details_context
+from app.rollups import get_rollup, gap_percentage
+from app.trends import get_trend_series
+from app.analytics import get_top_problem_skills, get_skill_comparison
+from app.importer import import_uploaded_file
+from app.cache import cached_view
+from app.exports import scope_csv_response
+from app.jobs import submit_job, job_status
+from app.search import search_people
 
 @bp.route('/dashboard')
+@cached_view
 def dashboard():
     """Group delivery lead dashboard showing complete enterprise hierarchy."""
     gdl_name = request.args.get('gdl', 'Daniel Hardman')
 
-    # Get DHs under this GDL
-    dh_names = get_dhs_by_gdl(gdl_name)
-
-    dhs_data = []
-    for dh in dh_names:
-        dl_names = get_dls_by_dh(dh)
-        dls_data = []
-
-        for dl in dl_names:
-            manager_names = get_managers_by_dl(dl)
-            managers_data = []
-
-            for mgr in manager_names:
-                emp_list = get_employees_by_manager(mgr)
-                employees_summary = get_employee_summary(emp_list)
-                managers_data.append({
-                    'name': mgr,
-                    'employees': employees_summary
-                })
-
-            dls_data.append({
-                'name': dl,
-                'managers': managers_data
-            })
-
-        dhs_data.append({
-            'name': dh,
-            'dls': dls_data
-        })
+    # Only the DHs with their totals; deeper levels load when a node is expanded
+    dhs_data = get_child_nodes(get_scope_units('gdl', gdl_name))
 
     return render_template('group_delivery_lead/dashboard.html',
                          gdl_name=gdl_name,
-                         dhs=dhs_data)
+                         dhs=dhs_data,
+                         gap_pct=gap_percentage(get_rollup('gdl', gdl_name)))
+
+@bp.route('/org-units/<int:unit_id>/children')
+@cached_view
+def unit_children(unit_id):
+    """One level of the org tree below a unit, fetched when a dashboard accordion opens."""
+    unit = db.session.get(OrgUnit, unit_id) or abort(404)
+    return jsonify(get_unit_children(unit))
+
+@bp.route('/search')
+def search():
+    """Ranked people search within the group delivery lead's org, for the Smart Filter Bar."""
+    gdl_name = request.args.get('gdl', 'Daniel Hardman')
+    query = request.args.get('q', '')
+    return jsonify(query=query, results=search_people(query, units=get_scope_units('gdl', gdl_name)))
 
 @bp.route('/employee/<nbk>')
 def employee_details(nbk):
@@ -53,14 +54,49 @@ def employee_details(nbk):
                          **context)
 
 @bp.route('/reports')
+@cached_view
 def reports():
     """Group delivery lead reports view."""
-    return render_template('group_delivery_lead/reports.html')
+    gdl_name = request.args.get('gdl', 'Daniel Hardman')
+    # Monthly points over the last year unless weekly ones are asked for
+    trend_period = 'week' if request.args.get('trend') == 'week' else 'month'
 
-@bp.route('/import-data')
+    rollup = get_rollup('gdl', gdl_name)
+
+    top_skills = get_top_problem_skills('gdl', gdl_name)
+    comparison = get_skill_comparison('gdl', gdl_name, tuple(skill['skill_name'] for skill in top_skills))
+
+    return render_template('group_delivery_lead/reports.html',
+                         gdl_name=gdl_name,
+                         total_employees=rollup['headcount'],
+                         gap_pct=gap_percentage(rollup),
+                         rollup=rollup,
+                         trend=get_trend_series('gdl', gdl_name, trend_period),
+                         trend_period=trend_period,
+                         top_skills=top_skills,
+                         comparison=comparison)
+
+@bp.route('/reports/export.csv')
+def export_csv():
+    """Group delivery lead report data as a streaming CSV download."""
+    gdl_name = request.args.get('gdl', 'Daniel Hardman')
+    return scope_csv_response('Group Delivery Lead', 'gdl', gdl_name)
+
+@bp.route('/reports/export.pdf', methods=['POST'])
+def export_pdf():
+    """Queue a PDF render of the group delivery lead report; the page polls the returned job."""
+    gdl_name = request.args.get('gdl', 'Daniel Hardman')
+    job = submit_job('report_pdf', 'gdl', gdl_name)
+    return jsonify(job_status(job)), 200 if job.status == 'Done' else 202
+
+@bp.route('/import-data', methods=['GET', 'POST'])
 def import_data():
-    """Group delivery lead data import view."""
-    return render_template('group_delivery_lead/import_data.html')
+    """Group delivery lead data import view; POST streams the uploaded CSV into the database."""
+    import_log = None
+    if request.method == 'POST':
+        import_log = import_uploaded_file(request.files.get('file'), imported_by='Group Delivery Lead')
+
+    return render_template('group_delivery_lead/import_data.html', import_log=import_log)
 
 @bp.route('/settings')
 def settings():
@@ -0,0 +1,144 @@
+from app.models import Employee
+from app.org_units import HIERARCHY_LEVELS, get_scope_units, get_subtree_units, subtree_employee_filter
+from app.snapshot import get_snapshot
+from app.utils import get_skill_counts, summarize_employee, get_employee_summary_by_scope
+
+# Key under which each level keeps its children in the assembled tree
+CHILD_KEYS = {
+    'gdl': 'dhs',
+    'dh': 'dls',
+    'dl': 'managers',
+    'manager': 'employees',
+}
+
+
+def _new_node(unit):
+    return {'id': unit.id, 'name': unit.name, CHILD_KEYS[unit.level]: []}
+
+
+def _rollup(node, level):
+    """Fill in aggregate counts for a node from its (already built) children."""
+    children = node[CHILD_KEYS[level]]
+
+    if level == 'manager':
+        node['total_employees'] = len(children)
+        node['total_reports'] = len(children)
+        node['total_managers'] = 1
+        node['total_skills'] = sum(e['total_skills'] for e in children)
+        node['total_gaps'] = sum(e['current_gaps'] for e in children)
+        node['future_gaps'] = sum(e['future_gaps'] for e in children)
+        return
+
+    child_level = HIERARCHY_LEVELS[HIERARCHY_LEVELS.index(level) + 1]
+    for child in children:
+        _rollup(child, child_level)
+
+    for key in ('total_employees', 'total_managers', 'total_skills', 'total_gaps', 'future_gaps'):
+        node[key] = sum(c[key] for c in children)
+
+
+def build_hierarchy(level, name):
+    """
+    Build the org tree below a scope (e.g. every DH, DL, manager and employee
+    under a GDL) from the org_units tree, with a fixed number of queries
+    independent of org size.
+    Returns the list of child nodes of the scope, each carrying its children
+    and rolled-up totals.
+    """
+    child_levels = HIERARCHY_LEVELS[HIERARCHY_LEVELS.index(level) + 1:]
+
+    scope_units = get_scope_units(level, name)
+    scope_ids = {unit.id for unit in scope_units}
+
+    tree = []
+    nodes = {}
+    # Parents sort before their children on path, siblings stay in name order
+    units = sorted(get_subtree_units(scope_units), key=lambda unit: unit.path.count('/'))
+    unit_levels = {unit.id: unit.level for unit in units}
+    for unit in units:
+        if unit.id in scope_ids:
+            continue
+        node = _new_node(unit)
+        nodes[unit.id] = node
+        if unit.parent_id in scope_ids:
+            tree.append(node)
+        elif unit.parent_id in nodes:
+            nodes[unit.parent_id][CHILD_KEYS[unit_levels[unit.parent_id]]].append(node)
+
+    # Only people under a line manager are leaves; leaders sit in the unit they lead
+    criteria = [subtree_employee_filter(scope_units)]
+    employees = Employee.query.filter(*criteria).all()
+    counts = get_skill_counts(criteria=criteria)
+    for emp in employees:
+        if emp.org_unit_id in nodes and unit_levels[emp.org_unit_id] == 'manager':
+            nodes[emp.org_unit_id]['employees'].append(summarize_employee(emp, counts.get(emp.nbk)))
+        elif emp.org_unit_id in scope_ids and level == 'manager':
+            tree.append(summarize_employee(emp, counts.get(emp.nbk)))
+
+    if child_levels:
+        for node in tree:
+            _rollup(node, child_levels[0])
+
+    return tree
+
+
+def _path_ids(path):
+    return [int(unit_id) for unit_id in path.strip('/').split('/')]
+
+
+def get_child_nodes(units):
+    """
+    One level of the org tree below the given units (a scope's units, or a
+    single node being expanded), each child carrying totals for its whole
+    subtree. One query for the units, with team totals from the skills
+    snapshot, and only the children are returned, so the payload does not
+    grow with the size of the subtree.
+    """
+    parent_ids = {unit.id for unit in units}
+    subtree = get_subtree_units(units)
+
+    # Subtree units come ordered by name, so children do too
+    nodes = {}
+    for unit in subtree:
+        if unit.parent_id in parent_ids:
+            nodes[unit.id] = {
+                'id': unit.id, 'level': unit.level, 'name': unit.name,
+                'total_dls': 0, 'total_managers': 0, 'total_employees': 0,
+                'total_skills': 0, 'total_gaps': 0, 'future_gaps': 0,
+            }
+
+    # {manager unit id: (headcount, skills, gaps, future gaps)} for every team in the subtree
+    counts = get_snapshot().team_totals(units)
+    for unit in subtree:
+        owner = next((nodes[unit_id] for unit_id in _path_ids(unit.path) if unit_id in nodes), None)
+        if owner is None:
+            continue
+        if unit.level == 'dl':
+            owner['total_dls'] += 1
+        elif unit.level == 'manager':
+            owner['total_managers'] += 1
+            headcount, skills, gaps, future_gaps = counts.get(unit.id, (0, 0, 0, 0))
+            owner['total_employees'] += headcount
+            owner['total_skills'] += skills or 0
+            owner['total_gaps'] += gaps or 0
+            owner['future_gaps'] += future_gaps or 0
+
+    for node in nodes.values():
+        if node['level'] == 'manager':
+            node['total_reports'] = node['total_employees']
+    return list(nodes.values())
+
+
+def get_unit_children(unit):
+    """
+    Payload for expanding one node on a dashboard: child units with totals,
+    or a manager's team (employee summaries) when the node is a manager.
+    """
+    if unit.level == 'manager':
+        child_level = 'employee'
+        children = get_employee_summary_by_scope(org_unit_id=unit.id)
+    else:
+        child_level = HIERARCHY_LEVELS[HIERARCHY_LEVELS.index(unit.level) + 1]
+        children = get_child_nodes([unit])
+    return {'id': unit.id, 'level': unit.level, 'name': unit.name,
+            'child_level': child_level, 'children': children}
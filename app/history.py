@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, insert, update, bindparam, func
+from app import db
+from app.models import Employee, SkillKey, SkillHistory
+from app.org_units import get_scope_units, subtree_employee_filter
+from app.snapshot import get_snapshot
+from app.utils import chunked
+
+# Weeks of gap counts get_gap_trend returns by default (the manager report's window)
+TREND_WEEKS = 12
+
+# Rows per executemany when writing keys and history
+HISTORY_WRITE_BATCH = 5000
+
+# Values compared between refreshes; -1 stands for NULL while diffing
+HISTORY_VALUES = ['user_level', 'gap_current_severity', 'gap_future_severity']
+
+
+def _skill_keys(snapshot, rows):
+    """Diff key of the given skill rows: employee index * skill count + skill code."""
+    return snapshot.skill_employee[rows].astype(np.int64) * len(snapshot.skill_names) + snapshot.skill_code[rows]
+
+
+def _current_state(snapshot):
+    """
+    Current values per _skill_keys key from the skills snapshot. Legacy
+    duplicate rows keep the first one.
+    """
+    rows = (snapshot.skill_employee >= 0) & (snapshot.skill_code >= 0)
+    return pd.DataFrame({
+        'key': _skill_keys(snapshot, rows),
+        'user_level': snapshot.skill_level[rows].astype(np.int64),
+        'gap_current_severity': snapshot.skill_current[rows].astype(np.int64),
+        'gap_future_severity': snapshot.skill_future[rows].astype(np.int64),
+    }).drop_duplicates('key')
+
+
+def _stored_state(snapshot):
+    """skill_keys with the same keys as _current_state; -1 for pairs the snapshot no longer has."""
+    # Core rows straight off the connection, as build_snapshot reads skills
+    stored = pd.DataFrame(db.session.connection().execute(
+        select(SkillKey.id, SkillKey.employee_nbk, SkillKey.skill_name, SkillKey.active,
+               *[getattr(SkillKey, column) for column in HISTORY_VALUES])
+    ).all(), columns=['id', 'employee_nbk', 'skill_name', 'active'] + HISTORY_VALUES)
+
+    employees = pd.Index(snapshot.nbks).get_indexer(stored['employee_nbk'])
+    codes = pd.Index(snapshot.skill_names).get_indexer(stored['skill_name'])
+    known = (employees >= 0) & (codes >= 0)
+    stored['key'] = np.where(known, employees.astype(np.int64) * len(snapshot.skill_names) + codes, -1)
+    stored[HISTORY_VALUES] = stored[HISTORY_VALUES].fillna(-1).astype(np.int64)
+    return stored.drop(columns=['employee_nbk', 'skill_name'])
+
+
+def _nullable(value):
+    return None if value < 0 else int(value)
+
+
+def record_skill_history(snapshot, snapshot_date=None):
+    """
+    Append to skill_history the (employee, skill) pairs whose level or gap
+    severities changed since the last recorded state, new pairs and dropped
+    ones, dated snapshot_date (today, UTC). Unchanged pairs write nothing,
+    so history grows with the amount of change, not with headcount.
+    A second run on the same date folds into that date's rows. Does not
+    commit: it runs inside the import's transaction.
+    """
+    snapshot_date = snapshot_date or datetime.utcnow().date()
+    current = _current_state(snapshot)
+    stored = _stored_state(snapshot)
+
+    merged = current.merge(stored[stored['key'] >= 0], on='key', how='outer', suffixes=('', '_last'),
+                           indicator='side')
+    # Pairs whose employee or skill disappeared altogether are dropped too
+    orphans = stored[stored['key'] < 0].rename(columns={column: f'{column}_last' for column in HISTORY_VALUES})
+    merged = pd.concat([merged, orphans.assign(side='right_only')], ignore_index=True)
+
+    is_new = merged['side'] == 'left_only'
+    is_gone = (merged['side'] == 'right_only') & merged['active'].astype(bool)
+    is_both = merged['side'] == 'both'
+    is_changed = is_both & (~merged['active'].astype(bool) | np.logical_or.reduce(
+        [merged[column] != merged[f'{column}_last'] for column in HISTORY_VALUES]))
+    changes = merged[is_new | is_gone | is_changed].copy()
+    if changes.empty:
+        return 0
+
+    present = changes['side'] != 'right_only'
+    for column in HISTORY_VALUES:
+        changes[column] = changes[column].where(present, -1).fillna(-1).astype(np.int64)
+        changes[f'{column}_last'] = changes[f'{column}_last'].fillna(-1).astype(np.int64)
+    changes['gap_delta'] = (changes['gap_current_severity'] > 0).astype(int) \
+        - (changes['gap_current_severity_last'] > 0).astype(int)
+    changes['future_gap_delta'] = (changes['gap_future_severity'] > 0).astype(int) \
+        - (changes['gap_future_severity_last'] > 0).astype(int)
+
+    # New pairs get the next ids
+    new = changes['side'] == 'left_only'
+    next_id = (db.session.execute(select(func.max(SkillKey.id))).scalar() or 0) + 1
+    changes.loc[new, 'id'] = np.arange(next_id, next_id + new.sum())
+    changes['id'] = changes['id'].astype(np.int64)
+    skill_count = len(snapshot.skill_names)
+
+    def values(row):
+        if row.side == 'right_only':
+            return dict.fromkeys(HISTORY_VALUES)
+        return {column: _nullable(getattr(row, column)) for column in HISTORY_VALUES}
+
+    key_rows, history_rows = [], []
+    for row in changes.itertuples(index=False):
+        key_values = dict(values(row), active=row.side != 'right_only')
+        if row.side == 'left_only':
+            key_rows.append(dict(key_values, id=int(row.id),
+                                 employee_nbk=str(snapshot.nbks[row.key // skill_count]),
+                                 skill_name=str(snapshot.skill_names[row.key % skill_count])))
+        else:
+            key_rows.append(dict(key_values, b_id=int(row.id)))
+        history_rows.append(dict(values(row), key_id=int(row.id), snapshot_date=snapshot_date,
+                                 gap_delta=int(row.gap_delta), future_gap_delta=int(row.future_gap_delta)))
+
+    # Same-date rows already written by an earlier run: keep one row, add up the deltas
+    earlier = {key_id: (gaps, future) for key_id, gaps, future in db.session.execute(
+        select(SkillHistory.key_id, SkillHistory.gap_delta, SkillHistory.future_gap_delta)
+        .where(SkillHistory.snapshot_date == snapshot_date)
+    )}
+    for row in history_rows:
+        if row['key_id'] in earlier:
+            gaps, future = earlier[row['key_id']]
+            row.update(b_key_id=row['key_id'], gap_delta=row['gap_delta'] + gaps,
+                       future_gap_delta=row['future_gap_delta'] + future)
+
+    table, history = SkillKey.__table__, SkillHistory.__table__
+    for batch in chunked(key_rows, HISTORY_WRITE_BATCH):
+        inserted = [row for row in batch if 'b_id' not in row]
+        updated = [row for row in batch if 'b_id' in row]
+        if inserted:
+            db.session.execute(insert(table), inserted)
+        if updated:
+            db.session.execute(update(table).where(table.c.id == bindparam('b_id'))
+                               .values(**{column: bindparam(column) for column in HISTORY_VALUES + ['active']}),
+                               updated)
+    for batch in chunked(history_rows, HISTORY_WRITE_BATCH):
+        appended = [row for row in batch if 'b_key_id' not in row]
+        folded = [row for row in batch if 'b_key_id' in row]
+        if appended:
+            db.session.execute(insert(history), appended)
+        if folded:
+            db.session.execute(
+                update(history).where(history.c.key_id == bindparam('b_key_id'),
+                                      history.c.snapshot_date == snapshot_date)
+                .values(**{column: bindparam(column)
+                           for column in HISTORY_VALUES + ['gap_delta', 'future_gap_delta']}),
+                folded)
+    return len(history_rows)
+
+
+def _current_gap_counts(snapshot, units):
+    """Current and future gaps under the units, counted the way skill_history counts them."""
+    rows = np.flatnonzero(snapshot.scope_employees(units)[snapshot.skill_employee] & (snapshot.skill_code >= 0))
+    _, first = np.unique(_skill_keys(snapshot, rows), return_index=True)
+    rows = rows[first]
+    return int((snapshot.skill_current[rows] > 0).sum()), int((snapshot.skill_future[rows] > 0).sum())
+
+
+def get_gap_trend(level, name, weeks=TREND_WEEKS, today=None):
+    """
+    Current and future gap counts under a scope at the end of each of the
+    last `weeks` weeks (Monday-dated, oldest first). Counts are worked back
+    from today's, taken from the skills snapshot, by subtracting the deltas
+    recorded after each week, so only change rows inside the window are
+    read. Scope membership is today's org.
+    """
+    today = today or datetime.utcnow().date()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    units = get_scope_units(level, name)
+
+    rows = db.session.execute(
+        select(SkillHistory.snapshot_date, func.sum(SkillHistory.gap_delta),
+               func.sum(SkillHistory.future_gap_delta))
+        .join(SkillKey, SkillKey.id == SkillHistory.key_id)
+        .join(Employee, Employee.nbk == SkillKey.employee_nbk)
+        .where(subtree_employee_filter(units),
+               SkillHistory.snapshot_date >= first_week + timedelta(weeks=1),
+               SkillHistory.snapshot_date <= today)
+        .group_by(SkillHistory.snapshot_date)
+    ).all()
+
+    # Net change recorded during each week
+    gap_deltas, future_gap_deltas = [0] * weeks, [0] * weeks
+    for day, gap_delta, future_gap_delta in rows:
+        week = (day - first_week).days // 7
+        gap_deltas[week] += gap_delta
+        future_gap_deltas[week] += future_gap_delta
+
+    gaps, future_gaps = _current_gap_counts(get_snapshot(), units)
+    trend = []
+    for week in reversed(range(weeks)):
+        trend.append({'week': first_week + timedelta(weeks=week), 'current_gaps': gaps, 'future_gaps': future_gaps})
+        gaps -= gap_deltas[week]
+        future_gaps -= future_gap_deltas[week]
+    return trend[::-1]
@@ -0,0 +1,309 @@
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import insert, update, delete, bindparam, select, func
+from app import db
+from app.models import Employee, Skill, DataImportLog
+from app.proficiency import apply_levels_and_gaps
+from app.data_version import advance_data_version, get_data_version
+from app.org_units import rebuild_org_units
+from app.history import record_skill_history
+from app.rollups import refresh_rollups
+from app.search import rebuild_search_index
+from app.snapshot import build_snapshot, persist_snapshot, publish_snapshot
+from app.trends import record_scope_trends
+from app.utils import chunked
+
+# CSV header -> employees column
+EMPLOYEE_COLUMNS = {
+    'NBK': 'nbk',
+    'Name': 'name',
+    'Email': 'email',
+    'Role': 'role',
+    'FunctionName': 'function_name',
+    'PM/IC': 'pm_ic',
+    'MgrName': 'manager_name',
+    'DLName': 'dl_name',
+    'DHName': 'dh_name',
+    'GDLName': 'gdl_name',
+}
+
+# CSV header -> skills column
+SKILL_COLUMNS = {
+    'NBK': 'employee_nbk',
+    'SkillName': 'skill_name',
+    'SkillType': 'skill_type',
+    'EmpSkillCategory': 'emp_skill_category',
+    'User Proficiency': 'user_proficiency',
+    'Expected Current Prof': 'expected_current_prof',
+    'GAP-Current': 'gap_current',
+    'Expected Future Prof': 'expected_future_prof',
+    'GAP-Future': 'gap_future',
+}
+
+REQUIRED_COLUMNS = list(dict.fromkeys(list(EMPLOYEE_COLUMNS) + list(SKILL_COLUMNS)))
+
+# Skill columns whose values make up a row's fingerprint (everything but the key)
+FINGERPRINT_COLUMNS = [column for column in SKILL_COLUMNS.values()
+                       if column not in ('employee_nbk', 'skill_name')]
+
+# Integer columns derived from the proficiency strings at import time
+LEVEL_COLUMNS = ['user_level', 'expected_current_level', 'expected_future_level',
+                 'gap_current_severity', 'gap_future_severity']
+
+IMPORT_MODES = ('append', 'delta')
+
+
+def check_columns(columns):
+    """Raise ValueError naming the required CSV columns that are missing."""
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+@contextmanager
+def timed_stage(log, stage):
+    """Record how long the block took, in seconds, under stage in log.stage_timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        log.stage_timings = dict(log.stage_timings or {}, **{stage: round(time.perf_counter() - started, 3)})
+
+
+def _frame_records(frame):
+    """DataFrame rows as plain dicts for executemany, NaN -> None."""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def _records(df, columns):
+    """Rename CSV columns to table columns and return plain dicts, NaN -> None."""
+    return _frame_records(df[list(columns)].rename(columns=columns))
+
+
+def upsert_employees(chunk):
+    """Insert new employees and update existing ones, one executemany each."""
+    employees = _records(chunk.drop_duplicates(subset=['NBK'], keep='last'), EMPLOYEE_COLUMNS)
+    table = Employee.__table__
+
+    existing = set()
+    for nbks in chunked([e['nbk'] for e in employees]):
+        existing.update(db.session.execute(select(table.c.nbk).where(table.c.nbk.in_(nbks))).scalars())
+
+    new_rows = [e for e in employees if e['nbk'] not in existing]
+    changed_rows = [dict(e, b_nbk=e['nbk']) for e in employees if e['nbk'] in existing]
+
+    if new_rows:
+        db.session.execute(insert(table), new_rows)
+    if changed_rows:
+        values = {column: bindparam(column) for column in EMPLOYEE_COLUMNS.values() if column != 'nbk'}
+        db.session.execute(
+            update(table).where(table.c.nbk == bindparam('b_nbk')).values(**values),
+            changed_rows
+        )
+
+
+def skill_frame(chunk):
+    """
+    Skill rows of a chunk as a DataFrame of table columns, with levels, gaps
+    and severities computed for the whole chunk, plus row_hash.
+    """
+    frame = apply_levels_and_gaps(chunk[list(SKILL_COLUMNS)].rename(columns=SKILL_COLUMNS))
+    # Vectorized 64-bit hash of the value columns, stored as a signed BIGINT
+    hashes = pd.util.hash_pandas_object(frame[FINGERPRINT_COLUMNS].fillna(''), index=False)
+    frame['row_hash'] = hashes.values.view('int64')
+    return frame
+
+
+def _insert_skills(chunk):
+    """Append the chunk's skill rows with a single executemany."""
+    skills = _frame_records(skill_frame(chunk))
+    if skills:
+        db.session.execute(insert(Skill.__table__), skills)
+    return len(skills)
+
+
+def delta_state():
+    """Bookkeeping shared by the chunks of one delta load (see apply_skill_delta)."""
+    return {
+        'nbks': set(),
+        'matched': [],
+        'max_id': db.session.execute(select(func.coalesce(func.max(Skill.id), 0))).scalar(),
+    }
+
+
+def apply_skill_delta(frame, state):
+    """
+    Diff a skill_frame against stored skills by (employee_nbk, skill_name)
+    and fingerprint, then insert new rows and update changed ones in bulk.
+    Matched ids are recorded in state so stale rows can be deleted at the end.
+    Returns (inserted, updated).
+    """
+    frame = frame.drop_duplicates(subset=['employee_nbk', 'skill_name'], keep='last')
+    nbks = frame['employee_nbk'].unique().tolist()
+    state['nbks'].update(nbks)
+
+    table = Skill.__table__
+    existing = []
+    for batch in chunked(nbks):
+        existing.extend(db.session.execute(
+            select(table.c.id, table.c.employee_nbk, table.c.skill_name, table.c.row_hash)
+            .where(table.c.employee_nbk.in_(batch))
+            .order_by(table.c.id)
+        ).all())
+
+    # Legacy append runs can leave several rows per key: keep the oldest,
+    # the others go out with the stale rows
+    existing = pd.DataFrame(existing, columns=['id', 'employee_nbk', 'skill_name', 'stored_hash'])
+    existing = existing.drop_duplicates(subset=['employee_nbk', 'skill_name'], keep='first')
+
+    merged = frame.merge(existing, how='left', on=['employee_nbk', 'skill_name'])
+    is_new = merged['id'].isna()
+    is_changed = ~is_new & (merged['stored_hash'] != merged['row_hash'])
+
+    state['matched'].append(merged.loc[~is_new, 'id'].to_numpy(dtype='int64'))
+
+    new_rows = _frame_records(merged.loc[is_new, frame.columns])
+    if new_rows:
+        db.session.execute(insert(table), new_rows)
+
+    changed = merged.loc[is_changed, frame.columns.drop(['employee_nbk', 'skill_name'])]
+    changed = changed.assign(b_id=merged.loc[is_changed, 'id'].astype('int64'),
+                             last_updated=datetime.utcnow())
+    changed_rows = _frame_records(changed)
+    if changed_rows:
+        updated_columns = FINGERPRINT_COLUMNS + LEVEL_COLUMNS + ['row_hash', 'last_updated']
+        values = {column: bindparam(column) for column in updated_columns}
+        db.session.execute(update(table).where(table.c.id == bindparam('b_id')).values(**values),
+                           changed_rows)
+
+    return len(new_rows), len(changed_rows)
+
+
+def delete_stale_skills(state):
+    """
+    Delete skills of employees present in the file that the file no longer lists.
+    Only rows that existed before the import started are candidates.
+    """
+    matched = np.concatenate(state['matched']) if state['matched'] else np.array([], dtype='int64')
+    table = Skill.__table__
+
+    deleted = 0
+    for batch in chunked(sorted(state['nbks'])):
+        ids = np.fromiter(db.session.execute(
+            select(table.c.id).where(table.c.employee_nbk.in_(batch), table.c.id <= state['max_id'])
+        ).scalars(), dtype='int64')
+        stale = ids[~np.isin(ids, matched)].tolist()
+        for id_batch in chunked(stale):
+            db.session.execute(delete(table).where(table.c.id.in_(id_batch)))
+        deleted += len(stale)
+
+    return deleted
+
+
+def import_skills_csv(source, filename=None, imported_by=None, chunksize=None, mode='delta'):
+    """
+    Stream a skills CSV into employees/skills in fixed-size chunks.
+    Each chunk is upserted/inserted with Core executemany and committed along
+    with the running row count in DataImportLog, so memory stays flat and the
+    log shows progress while a large file loads.
+
+    mode='delta' (default) treats the file as the current state of every
+    employee it mentions: only new, changed and removed skill rows are
+    written, and the counts land in the log. mode='append' inserts every
+    row as-is.
+    Returns the DataImportLog for the run.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    chunksize = chunksize or current_app.config['IMPORT_CHUNK_SIZE']
+    if filename is None:
+        filename = os.path.basename(source) if isinstance(source, str) else 'upload.csv'
+
+    log = DataImportLog(imported_by=imported_by, filename=filename[:100], mode=mode,
+                        row_count=0, inserted_count=0, updated_count=0, deleted_count=0,
+                        status='In Progress')
+    db.session.add(log)
+    db.session.commit()
+
+    state = delta_state()
+
+    try:
+        with timed_stage(log, 'load'):
+            reader = pd.read_csv(source, dtype=str, chunksize=chunksize)
+            for chunk in reader:
+                check_columns(chunk.columns)
+                chunk = chunk[chunk['NBK'].notna()]
+                upsert_employees(chunk)
+                if mode == 'delta':
+                    inserted, updated = apply_skill_delta(skill_frame(chunk), state)
+                    log.updated_count += updated
+                else:
+                    inserted = _insert_skills(chunk)
+                log.inserted_count += inserted
+
+                log.row_count += len(chunk)
+                db.session.commit()
+
+            if mode == 'delta':
+                log.deleted_count = delete_stale_skills(state)
+        log.status = 'Success'
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        # Chunks committed before the failure stay loaded
+        log.status = 'Partial' if log.row_count else 'Failed'
+        log.error_message = str(e)
+        db.session.commit()
+        current_app.logger.exception('Import of %s failed', filename)
+
+    if log.inserted_count or log.updated_count or log.deleted_count:
+        rebuild_derived_data(log)
+
+    return log
+
+
+def rebuild_derived_data(log):
+    """
+    Rebuild everything derived from employees and skills after a load (org
+    units, skills snapshot, rollups, skill history, trend series, search
+    index) and advance the data version, then commit it all together with
+    any load still pending in the session: readers, and caches keyed on the
+    version, switch from the old data to the new at once. The snapshot is
+    persisted before the commit, so workers find it as soon as they see the
+    new version. Each step is timed into log.
+    """
+    with timed_stage(log, 'org_units'):
+        rebuild_org_units()
+    with timed_stage(log, 'snapshot'):
+        snapshot = build_snapshot()
+    with timed_stage(log, 'rollups'):
+        refresh_rollups(snapshot)
+    with timed_stage(log, 'history'):
+        record_skill_history(snapshot)
+    with timed_stage(log, 'trends'):
+        record_scope_trends(snapshot)
+    with timed_stage(log, 'search_index'):
+        rebuild_search_index()
+    version = advance_data_version()
+    persist_snapshot(snapshot, version)
+    db.session.commit()
+    # Re-read so this process's conditional GETs stop matching old ETags at once
+    get_data_version()
+    publish_snapshot(snapshot, version)
+
+
+def import_uploaded_file(file, imported_by=None):
+    """Run import_skills_csv on a Werkzeug upload from an import_data form."""
+    if not file or not file.filename:
+        return DataImportLog(filename=None, row_count=0, status='Failed',
+                             error_message='No file was uploaded.')
+    if not file.filename.lower().endswith('.csv'):
+        return DataImportLog(filename=file.filename[:100], row_count=0, status='Failed',
+                             error_message='Only CSV files can be imported.')
+
+    return import_skills_csv(file.stream, filename=file.filename, imported_by=imported_by)
@@ -0,0 +1,107 @@
+import re
+import time
+from collections import Counter, deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from app import db
+
+# Collapse expanded IN lists and whitespace so "IN (?, ?, ?)" and "IN (?)" share a shape
+IN_LIST_PATTERN = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Statements shown per request on /debug/queries
+TOP_STATEMENTS = 5
+
+
+class RepeatedQueryError(Exception):
+    """The same statement shape ran more often than SQL_REPEAT_THRESHOLD in one request."""
+
+
+def statement_shape(statement):
+    """Normalized SQL used to spot the same query running over and over (N+1)."""
+    return IN_LIST_PATTERN.sub('(?)', WHITESPACE_PATTERN.sub(' ', statement).strip())
+
+
+def _request_stats():
+    if not has_request_context():
+        return None
+    return g.get('sql_stats')
+
+
+def init_instrumentation(app):
+    """
+    Count SQL statements and DB time per request via engine events.
+    Totals go out as X-SQL-Count / X-SQL-Time-ms headers and the last
+    requests are kept for /debug/queries. A statement shape repeated more
+    than SQL_REPEAT_THRESHOLD times is logged, or raises RepeatedQueryError
+    when SQL_REPEAT_RAISE is set (as tests should).
+    """
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    threshold = app.config['SQL_REPEAT_THRESHOLD']
+    raise_on_repeat = app.config['SQL_REPEAT_RAISE']
+    recent = deque(maxlen=app.config['SQL_RECENT_REQUESTS'])
+    app.extensions['sql_recent_requests'] = recent
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats()
+        if stats is None:
+            return
+        shape = statement_shape(statement)
+        stats['shapes'][shape] += 1
+        if raise_on_repeat and stats['shapes'][shape] > threshold:
+            raise RepeatedQueryError(
+                f"Statement ran more than {threshold} times in {request.path}: {shape}")
+        conn.info.setdefault('sql_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats()
+        if stats is None or not conn.info.get('sql_start'):
+            return
+        stats['count'] += 1
+        stats['time'] += time.perf_counter() - conn.info['sql_start'].pop()
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = {'count': 0, 'time': 0.0, 'shapes': Counter()}
+
+    @app.after_request
+    def record_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        time_ms = round(stats['time'] * 1000, 2)
+        response.headers['X-SQL-Count'] = str(stats['count'])
+        response.headers['X-SQL-Time-ms'] = str(time_ms)
+
+        repeated = [{'statement': shape, 'count': count}
+                    for shape, count in stats['shapes'].items() if count > threshold]
+        for entry in repeated:
+            app.logger.warning('Possible N+1 in %s: statement ran %d times: %s',
+                               request.path, entry['count'], entry['statement'])
+
+        if request.endpoint != 'main.debug_queries':
+            recent.append({
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'status': response.status_code,
+                'sql_count': stats['count'],
+                'sql_time_ms': time_ms,
+                'repeated': repeated,
+                'top_statements': [{'statement': shape, 'count': count}
+                                   for shape, count in stats['shapes'].most_common(TOP_STATEMENTS)],
+            })
+        return response
+
+
+def get_recent_requests(app):
+    """Newest-first SQL stats of the last requests, or None when instrumentation is off."""
+    recent = app.extensions.get('sql_recent_requests')
+    return None if recent is None else list(reversed(recent))
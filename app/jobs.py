@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, url_for
+from app import db
+from app.data_version import get_data_version
+from app.models import Job
+
+try:
+    import weasyprint
+except ImportError: # optional: only needed to render PDFs
+    weasyprint = None
+
+JOB_KINDS = ('report_pdf',)
+
+# Reports page rendered into the PDF for each scope level
+REPORT_ENDPOINTS = {
+    'manager': ('manager.reports', 'manager'),
+    'dl': ('delivery_lead.reports', 'dl'),
+    'dh': ('delivery_head.reports', 'dh'),
+    'gdl': ('group_delivery_lead.reports', 'gdl'),
+}
+
+ACTIVE_STATUSES = ('Queued', 'Running')
+
+_executor = None
+
+
+def _get_executor(app):
+    """Process pool shared by this web process, created on first use."""
+    global _executor
+    if _executor is None:
+        # spawn, not fork: workers must not inherit the parent's DB connections or threads
+        _executor = ProcessPoolExecutor(max_workers=app.config['JOB_WORKERS'],
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def _artifact_path(artifact_dir, job):
+    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', job.scope_name).strip('_')
+    return os.path.join(artifact_dir, f'{job.kind}_{job.scope_level}_{safe_name}_v{job.data_version}.pdf')
+
+
+def render_report_pdf(app, level, name, path):
+    """Render a scope's printable reports page to a PDF file at path."""
+    if weasyprint is None:
+        raise RuntimeError('PDF rendering needs WeasyPrint (pip install weasyprint).')
+
+    endpoint, arg = REPORT_ENDPOINTS[level]
+    with app.test_request_context():
+        url = url_for(endpoint, **{arg: name})
+    response = app.test_client().get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f'Rendering {url} returned {response.status_code}.')
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    weasyprint.HTML(string=response.get_data(as_text=True),
+                    base_url=os.path.dirname(app.static_folder)).write_pdf(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _run_job(job_id, database_uri, artifact_dir):
+    """Worker-process entry point: run one job and record the outcome on its row."""
+    from app import create_app
+    from app.config import Config
+
+    class JobConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        RESPONSE_CACHE_TYPE = 'null'
+        SQL_INSTRUMENTATION = False
+        REFRESH_SCHEDULER = False
+
+    app = create_app(JobConfig)
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        job.status = 'Running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            path = _artifact_path(artifact_dir, job)
+            if job.kind == 'report_pdf':
+                render_report_pdf(app, job.scope_level, job.scope_name, path)
+            job.artifact_path = path
+            job.status = 'Done'
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'Failed'
+            job.error_message = str(e)
+            app.logger.exception('Job %s failed', job_id)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def _reusable_job(kind, level, name, version):
+    """Latest job for the same request that is done (artifact still on disk) or still in flight."""
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])
+    jobs = Job.query.filter_by(kind=kind, scope_level=level, scope_name=name, data_version=version) \
+        .order_by(Job.id.desc()).all()
+    for job in jobs:
+        if job.status == 'Done' and job.artifact_path and os.path.exists(job.artifact_path):
+            return job
+        if job.status in ACTIVE_STATUSES:
+            if job.created_at >= stale_before:
+                return job
+            # Its worker died (e.g. a restart); give up on it
+            job.status = 'Failed'
+            job.error_message = 'Job did not finish in time.'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    return None
+
+
+def submit_job(kind, level, name):
+    """
+    Queue a job for a scope at the current data version, or return the
+    existing one when the same output is already built or being built.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if level not in REPORT_ENDPOINTS:
+        raise ValueError(f"Unknown scope level: {level}")
+
+    version = get_data_version()
+    job = _reusable_job(kind, level, name, version)
+    if job:
+        return job
+
+    job = Job(kind=kind, scope_level=level, scope_name=name, data_version=version, status='Queued')
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    artifact_dir = app.config['JOB_ARTIFACT_DIR']
+    os.makedirs(artifact_dir, exist_ok=True)
+    _get_executor(app).submit(_run_job, job.id, app.config['SQLALCHEMY_DATABASE_URI'], artifact_dir)
+    return job
+
+
+def job_status(job):
+    """JSON-ready status of a job, with its polling and download URLs."""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'scope_level': job.scope_level,
+        'scope_name': job.scope_name,
+        'data_version': job.data_version,
+        'status': job.status,
+        'error': job.error_message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': url_for('main.job_detail', job_id=job.id),
+        'download_url': url_for('main.job_artifact', job_id=job.id) if job.status == 'Done' else None,
+    }
@@ -1,7 +1,35 @@
-from flask import render_template
+import os
+from flask import render_template, jsonify, abort, current_app, send_file
+from app import db
 from app.main import bp
+from app.instrumentation import get_recent_requests
+from app.jobs import job_status
+from app.models import Job
 
 @bp.route('/')
 def index():
     """Landing page with role selection."""
     return render_template('index.html')
+
+@bp.route('/debug/queries')
+def debug_queries():
+    """SQL count, DB time and repeated statements of the last requests (debug only)."""
+    recent = get_recent_requests(current_app)
+    if recent is None or not (current_app.debug or current_app.config['SQL_DEBUG_ENDPOINT']):
+        abort(404)
+    return jsonify(requests=recent)
+
+@bp.route('/jobs/<int:job_id>')
+def job_detail(job_id):
+    """Status of a background job, polled by the report pages."""
+    job = db.session.get(Job, job_id) or abort(404)
+    return jsonify(job_status(job))
+
+@bp.route('/jobs/<int:job_id>/artifact')
+def job_artifact(job_id):
+    """Download the output of a finished job."""
+    job = db.session.get(Job, job_id) or abort(404)
+    if job.status != 'Done' or not job.artifact_path or not os.path.exists(job.artifact_path):
+        abort(404)
+    return send_file(job.artifact_path, mimetype='application/pdf', as_attachment=True,
+                     download_name=os.path.basename(job.artifact_path))
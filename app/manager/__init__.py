@@ -1,5 +1,7 @@
 from flask import Blueprint
+from app.cache import conditional_get
 
 bp = Blueprint('manager', __name__, url_prefix='/manager')
+conditional_get(bp)
 
 from app.manager import routes
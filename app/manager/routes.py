@@ -1,35 +1,46 @@
 from flask import render_template, request
 from app.manager import bp
-from app.utils import get_employees_by_manager, get_employee_summary, get_employee_details_context
+from app.utils import get_employee_summary_by_scope, get_employee_details_context, get_employee_details_contexts, \
+    get_team_page, get_team_options, TEAM_SORTS
+from app.rollups import get_rollup, gap_percentage
+from app.training import get_team_upskill_plans
+from app.history import get_gap_trend
+from app.importer import import_uploaded_file
+from app.cache import cached_view
+from app.exports import scope_csv_response
 
 @bp.route('/dashboard')
+@cached_view
 def dashboard():
     """Manager dashboard showing direct reports."""
     # For demo, use Harvey Specter as the logged-in manager
     manager_name = request.args.get('manager', 'Harvey Specter')
 
-    # Get employees under this manager
-    employees_list = get_employees_by_manager(manager_name)
-    employees_summary = get_employee_summary(employees_list)
-
-    # Apply filters if any
-    search = request.args.get('search', '').lower()
+    # Search, employee filter, sort and pagination all run in SQL
+    search = request.args.get('search', '').strip()
     employee_filter = request.args.get('employee', '')
+    sort = request.args.get('sort', 'name')
+    if sort not in TEAM_SORTS:
+        sort = 'name'
+    after = request.args.get('after')
 
-    if search:
-        employees_summary = [e for e in employees_summary if search in e['name'].lower() or search in e['nbk'].lower()]
-    if employee_filter:
-        employees_summary = [e for e in employees_summary if e['nbk'] == employee_filter]
+    employees_summary, next_cursor = get_team_page(manager_name, search=search, employee=employee_filter,
+                                                   sort=sort, after=after)
 
-    # For the filter dropdown, we need the full list of employees under this manager
-    # We can use the original employees_summary before filtering, or re-fetch. 
-    # Original code passed 'all_employees' which was the full summary.
-    all_employees_summary = get_employee_summary(employees_list)
+    # Team-wide KPIs come from the import-time rollup, not from the current page
+    rollup = get_rollup('manager', manager_name)
 
     return render_template('manager/dashboard.html',
                          manager_name=manager_name,
                          employees=employees_summary,
-                         all_employees=all_employees_summary)
+                         all_employees=get_team_options(manager_name),
+                         rollup=rollup,
+                         gap_pct=gap_percentage(rollup),
+                         search=search,
+                         employee_filter=employee_filter,
+                         sort=sort,
+                         after=after,
+                         next_cursor=next_cursor)
 
 @bp.route('/employee/<nbk>')
 def employee_details(nbk):
@@ -43,26 +54,42 @@ def employee_details(nbk):
                          **context)
 
 @bp.route('/reports')
+@cached_view
 def reports():
     """Manager reports view."""
     manager_name = request.args.get('manager', 'Harvey Specter')
-    employees_list = get_employees_by_manager(manager_name)
-    employees_summary = get_employee_summary(employees_list)
+    employees_summary = get_employee_summary_by_scope(manager_name=manager_name)
 
     # Calculate gap statistics
     total_skills = sum(e['total_skills'] for e in employees_summary)
     current_gaps = sum(e['current_gaps'] for e in employees_summary)
 
+    # Full details of every team member for the printable report, fetched in one batch
+    details = get_employee_details_contexts([e['nbk'] for e in employees_summary])
+
     return render_template('manager/reports.html',
                          manager_name=manager_name,
                          employees=employees_summary,
                          total_skills=total_skills,
-                         current_gaps=current_gaps)
+                         current_gaps=current_gaps,
+                         gap_trend=get_gap_trend('manager', manager_name),
+                         team_plans=get_team_upskill_plans(manager_name),
+                         team_details=[details[e['nbk']] for e in employees_summary if e['nbk'] in details])
 
-@bp.route('/import-data')
+@bp.route('/reports/export.csv')
+def export_csv():
+    """Manager report data as a streaming CSV download."""
+    manager_name = request.args.get('manager', 'Harvey Specter')
+    return scope_csv_response('Manager', 'manager', manager_name)
+
+@bp.route('/import-data', methods=['GET', 'POST'])
 def import_data():
-    """Manager data import view."""
-    return render_template('manager/import_data.html')
+    """Manager data import view; POST streams the uploaded CSV into the database."""
+    import_log = None
+    if request.method == 'POST':
+        import_log = import_uploaded_file(request.files.get('file'), imported_by='Manager')
+
+    return render_template('manager/import_data.html', import_log=import_log)
 
 @bp.route('/settings')
 def settings():
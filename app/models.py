@@ -1,6 +1,10 @@
 from app import db
 from datetime import datetime
 
+# Org unit paths ('/1/4/9/') are matched as subtree ranges and ordered, which needs
+# byte-wise comparison: PostgreSQL's locale collations skip the '/' separators
+ORG_PATH = db.String(255).with_variant(db.String(255, collation='C'), 'postgresql')
+
 class Employee(db.Model):
     __tablename__ = 'employees'
     nbk = db.Column(db.String(20), primary_key=True)
@@ -13,6 +17,8 @@ class Employee(db.Model):
     dl_name = db.Column(db.String(100))
     dh_name = db.Column(db.String(100))
     gdl_name = db.Column(db.String(100))
+    # Deepest org unit the employee sits in (their manager's unit for individual contributors)
+    org_unit_id = db.Column(db.Integer, db.ForeignKey('org_units.id'))
 
     # Relationships can be added later if we normalize manager/DL/DH/GDL into separate tables
     # or self-referential relationships if everyone is an employee.
@@ -22,6 +28,16 @@ class Employee(db.Model):
     training_plans = db.relationship('TrainingPlan', backref='employee', lazy=True)
     feedbacks = db.relationship('Feedback', backref='employee', lazy=True)
 
+    # Scope filters (WHERE <level>_name = ?) and DISTINCT child lookups
+    # (DLs under a DH, managers under a DL, DHs under a GDL)
+    __table_args__ = (
+        db.Index('ix_employees_gdl_dh', 'gdl_name', 'dh_name'),
+        db.Index('ix_employees_dh_dl_manager', 'dh_name', 'dl_name', 'manager_name'),
+        db.Index('ix_employees_dl_manager', 'dl_name', 'manager_name'),
+        db.Index('ix_employees_manager_name', 'manager_name'),
+        db.Index('ix_employees_org_unit_id', 'org_unit_id'),
+    )
+
 class Skill(db.Model):
     __tablename__ = 'skills'
     id = db.Column(db.Integer, primary_key=True)
@@ -35,6 +51,21 @@ class Skill(db.Model):
     expected_future_prof = db.Column(db.String(50))
     gap_future = db.Column(db.String(20))
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    row_hash = db.Column(db.BigInteger) # Fingerprint of the imported values, for delta imports
+    # Numeric form of the proficiency strings ("Level 2: Advanced" -> 2), set at import
+    user_level = db.Column(db.SmallInteger)
+    expected_current_level = db.Column(db.SmallInteger)
+    expected_future_level = db.Column(db.SmallInteger)
+    # Expected minus actual level, floored at 0; NULL when nothing is expected
+    gap_current_severity = db.Column(db.SmallInteger)
+    gap_future_severity = db.Column(db.SmallInteger)
+
+    __table_args__ = (
+        # Covers the per-employee skill/gap counts without touching the table
+        db.Index('ix_skills_employee_gaps', 'employee_nbk', 'gap_current_severity', 'gap_future_severity'),
+        # Key lookups for delta imports
+        db.Index('ix_skills_employee_skill', 'employee_nbk', 'skill_name'),
+    )
 
 class TrainingPlan(db.Model):
     __tablename__ = 'training_plans'
@@ -51,6 +82,10 @@ class TrainingPlan(db.Model):
     
     milestones = db.relationship('Milestone', backref='training_plan', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_training_plans_employee_nbk', 'employee_nbk'),
+    )
+
 class Milestone(db.Model):
     __tablename__ = 'milestones'
     id = db.Column(db.Integer, primary_key=True)
@@ -61,6 +96,10 @@ class Milestone(db.Model):
     completed = db.Column(db.Boolean, default=False)
     completed_date = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_milestones_training_plan_id', 'training_plan_id'),
+    )
+
 class Feedback(db.Model):
     __tablename__ = 'feedbacks'
     id = db.Column(db.Integer, primary_key=True)
@@ -70,6 +109,10 @@ class Feedback(db.Model):
     content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_feedbacks_employee_nbk', 'employee_nbk', 'created_at'),
+    )
+
 class DataImportLog(db.Model):
     __tablename__ = 'data_import_logs'
     id = db.Column(db.Integer, primary_key=True)
@@ -79,6 +122,11 @@ class DataImportLog(db.Model):
     status = db.Column(db.String(20))
     imported_at = db.Column(db.DateTime, default=datetime.utcnow)
     error_message = db.Column(db.Text)
+    mode = db.Column(db.String(10)) # append or delta
+    inserted_count = db.Column(db.Integer)
+    updated_count = db.Column(db.Integer)
+    deleted_count = db.Column(db.Integer)
+    stage_timings = db.Column(db.JSON) # {stage: seconds}, e.g. parse, load, rollups
 
 class Setting(db.Model):
     __tablename__ = 'settings'
@@ -95,3 +143,171 @@ class TrainingResource(db.Model):
     tier = db.Column(db.String(50))
     resource_url_1 = db.Column(db.String(255))
     resource_url_2 = db.Column(db.String(255))
+
+class GapRollup(db.Model):
+    """Precomputed skill/gap totals per org unit, rebuilt after every import."""
+    __tablename__ = 'gap_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.String(20), nullable=False) # manager, dl, dh or gdl
+    name = db.Column(db.String(100), nullable=False)
+    headcount = db.Column(db.Integer, default=0)
+    total_skills = db.Column(db.Integer, default=0)
+    current_gaps = db.Column(db.Integer, default=0)
+    future_gaps = db.Column(db.Integer, default=0)
+    # Current gaps bucketed by severity (see app.proficiency.PRIORITY_THRESHOLDS)
+    high_priority_gaps = db.Column(db.Integer, default=0)
+    medium_priority_gaps = db.Column(db.Integer, default=0)
+    low_priority_gaps = db.Column(db.Integer, default=0)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('level', 'name', name='uq_gap_rollups_level_name'),
+    )
+
+class OrgUnit(db.Model):
+    """
+    One GDL/DH/DL/manager node of the org tree, rebuilt from employees at import.
+    path is the materialized chain of ids from the root ('/1/4/9/'), so a whole
+    subtree is a single range scan on the path index.
+    """
+    __tablename__ = 'org_units'
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.String(20), nullable=False) # gdl, dh, dl or manager
+    name = db.Column(db.String(100), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey('org_units.id'))
+    path = db.Column(ORG_PATH, nullable=False)
+
+    employees = db.relationship('Employee', backref='org_unit', lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_org_units_path', 'path', unique=True),
+        db.Index('ix_org_units_level_name', 'level', 'name'),
+        db.Index('ix_org_units_parent_id', 'parent_id'),
+    )
+
+class DataVersion(db.Model):
+    """
+    Single-row counter bumped whenever imported data changes.
+    Anything derived from employees/skills (cached pages, ETags) is keyed on it.
+    """
+    __tablename__ = 'data_versions'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Job(db.Model):
+    """
+    Background job (e.g. a PDF report render) run by the local process pool.
+    Finished jobs double as the artifact cache: a request for the same kind,
+    scope and data version reuses the stored output.
+    """
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False) # e.g. report_pdf
+    scope_level = db.Column(db.String(20), nullable=False) # manager, dl, dh or gdl
+    scope_name = db.Column(db.String(100), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='Queued') # Queued, Running, Done, Failed
+    artifact_path = db.Column(db.String(255))
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_jobs_kind_scope_version', 'kind', 'scope_level', 'scope_name', 'data_version'),
+    )
+
+class SearchDocument(db.Model):
+    """
+    One employee in the people-search index. Ids are handed out in org path
+    order at rebuild, so everyone under a unit has a contiguous id range.
+    """
+    __tablename__ = 'search_documents'
+    id = db.Column(db.Integer, primary_key=True)
+    employee_nbk = db.Column(db.String(20), nullable=False)
+    path = db.Column(ORG_PATH, nullable=False) # org unit path, '' when unplaced
+
+    __table_args__ = (
+        db.Index('ix_search_documents_path_id', 'path', 'id'),
+    )
+
+class SearchPosting(db.Model):
+    """
+    Posting lists of one trigram as packed little-endian int32 search_documents
+    ids: documents whose own name, NBK or email contain it, and documents that
+    only match through their manager's name.
+    """
+    __tablename__ = 'search_postings'
+    gram = db.Column(db.String(3), primary_key=True)
+    doc_count = db.Column(db.Integer, nullable=False)
+    doc_ids = db.Column(db.LargeBinary, nullable=False)
+    manager_doc_ids = db.Column(db.LargeBinary, nullable=False)
+
+class SkillKey(db.Model):
+    """
+    Compact integer id for one (employee, skill) pair that skill_history
+    refers to, with the values last recorded for it so a refresh can be
+    diffed without reading the history. active is False once the employee
+    no longer holds the skill.
+    """
+    __tablename__ = 'skill_keys'
+    id = db.Column(db.Integer, primary_key=True)
+    employee_nbk = db.Column(db.String(20), nullable=False)
+    skill_name = db.Column(db.String(100), nullable=False)
+    user_level = db.Column(db.SmallInteger)
+    gap_current_severity = db.Column(db.SmallInteger)
+    gap_future_severity = db.Column(db.SmallInteger)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('employee_nbk', 'skill_name', name='uq_skill_keys_employee_skill'),
+    )
+
+class SkillHistory(db.Model):
+    """
+    Append-only change log of skill values: a row only when a key's level or
+    gap severities changed on a snapshot date (all values NULL when the
+    skill was dropped). gap_delta/future_gap_delta are the row's +1/0/-1
+    effect on gap counts, so a count at any date is a sum of deltas.
+    """
+    __tablename__ = 'skill_history'
+    key_id = db.Column(db.Integer, db.ForeignKey('skill_keys.id'), primary_key=True)
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    user_level = db.Column(db.SmallInteger)
+    gap_current_severity = db.Column(db.SmallInteger)
+    gap_future_severity = db.Column(db.SmallInteger)
+    gap_delta = db.Column(db.SmallInteger, nullable=False)
+    future_gap_delta = db.Column(db.SmallInteger, nullable=False)
+
+    # Rows of one snapshot date, for folding a second run on the same day
+    __table_args__ = (
+        db.Index('ix_skill_history_snapshot_date', 'snapshot_date'),
+    )
+
+class ScopeTrend(db.Model):
+    """
+    One point of an org unit's trend series, appended after every refresh:
+    gap counts, training plan completion and headcount under a GDL, DH, DL
+    or manager (by name, as in gap_rollups) on a snapshot date. A second
+    refresh on the same date replaces that date's points.
+    """
+    __tablename__ = 'scope_trends'
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.String(20), nullable=False) # manager, dl, dh or gdl
+    name = db.Column(db.String(100), nullable=False)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    headcount = db.Column(db.Integer, default=0)
+    total_skills = db.Column(db.Integer, default=0)
+    current_gaps = db.Column(db.Integer, default=0)
+    future_gaps = db.Column(db.Integer, default=0)
+    high_priority_gaps = db.Column(db.Integer, default=0)
+    plans_total = db.Column(db.Integer, default=0)
+    plans_completed = db.Column(db.Integer, default=0)
+
+    # A scope's series over a date range is one range scan on the unique
+    # index; the date index finds the points a same-day refresh replaces
+    __table_args__ = (
+        db.UniqueConstraint('level', 'name', 'snapshot_date', name='uq_scope_trends_level_name_date'),
+        db.Index('ix_scope_trends_snapshot_date', 'snapshot_date'),
+    )
@@ -0,0 +1,123 @@
+from sqlalchemy import select, insert, update, delete, bindparam, or_, and_, false, func
+from app import db
+from app.models import Employee, OrgUnit
+from app.utils import chunked
+
+# Org levels from the top of the hierarchy down to the line manager
+HIERARCHY_LEVELS = ['gdl', 'dh', 'dl', 'manager']
+
+LEVEL_COLUMNS = {
+    'gdl': Employee.gdl_name,
+    'dh': Employee.dh_name,
+    'dl': Employee.dl_name,
+    'manager': Employee.manager_name,
+}
+
+# Rows per executemany when pointing employees at their units
+EMPLOYEE_WRITE_BATCH = 5000
+
+
+def _name_path(names):
+    """Leading run of real unit names; 'N/A' or blank ends the chain."""
+    path = []
+    for name in names:
+        if not name or name == 'N/A':
+            break
+        path.append(name)
+    return tuple(path)
+
+
+def rebuild_org_units():
+    """
+    Sync org_units with the hierarchy columns on employees and point every
+    employee at its deepest unit. Units that still exist keep their ids (and
+    therefore their paths); new ones are added and vanished ones removed.
+    Only employees whose unit changes are written, each by primary key.
+    Does not commit: it runs inside the import's transaction.
+    """
+    columns = [LEVEL_COLUMNS[level] for level in HIERARCHY_LEVELS]
+    employees = db.session.execute(select(Employee.nbk, Employee.org_unit_id, *columns)).all()
+    combos = {tuple(employee[2:]) for employee in employees}
+
+    # Name path (gdl, dh, dl, manager prefix) -> unit, for what is stored now;
+    # parents come first because their paths are shorter
+    stored = {}
+    names_by_id = {}
+    for unit in OrgUnit.query.order_by(func.length(OrgUnit.path)).all():
+        names = names_by_id.get(unit.parent_id, ()) + (unit.name,)
+        names_by_id[unit.id] = names
+        stored[names] = unit
+
+    wanted = set()
+    for combo in combos:
+        names = _name_path(combo)
+        for depth in range(1, len(names) + 1):
+            wanted.add(names[:depth])
+
+    next_id = (db.session.execute(select(func.max(OrgUnit.id))).scalar() or 0) + 1
+    unit_ids = {names: unit.id for names, unit in stored.items() if names in wanted}
+    unit_paths = {names: unit.path for names, unit in stored.items() if names in wanted}
+
+    new_units = []
+    # Parents before children, then by name, so ids do not depend on set order
+    for names in sorted(wanted - set(unit_ids), key=lambda names: (len(names), names)):
+        parent = names[:-1]
+        unit_ids[names] = next_id
+        unit_paths[names] = (unit_paths[parent] if parent else '/') + f'{next_id}/'
+        new_units.append({
+            'id': next_id,
+            'level': HIERARCHY_LEVELS[len(names) - 1],
+            'name': names[-1],
+            'parent_id': unit_ids[parent] if parent else None,
+            'path': unit_paths[names],
+        })
+        next_id += 1
+
+    if new_units:
+        db.session.execute(insert(OrgUnit.__table__), new_units)
+
+    table = Employee.__table__
+    assignments = []
+    for employee in employees:
+        org_unit_id = unit_ids.get(_name_path(employee[2:]))
+        if org_unit_id != employee.org_unit_id:
+            assignments.append({'b_nbk': employee.nbk, 'org_unit_id': org_unit_id})
+    for batch in chunked(assignments, EMPLOYEE_WRITE_BATCH):
+        db.session.execute(
+            update(table).where(table.c.nbk == bindparam('b_nbk')).values(org_unit_id=bindparam('org_unit_id')),
+            batch
+        )
+
+    # Deepest first so no unit is removed before its children
+    obsolete = [unit for names, unit in stored.items() if names not in wanted]
+    obsolete.sort(key=lambda unit: len(unit.path), reverse=True)
+    for batch in chunked([unit.id for unit in obsolete]):
+        db.session.execute(delete(OrgUnit.__table__).where(OrgUnit.id.in_(batch)))
+
+
+def get_scope_units(level, name):
+    """Org units for a scope; one name can head several units (e.g. a manager in two DLs)."""
+    return OrgUnit.query.filter_by(level=level, name=name).all()
+
+
+def subtree_condition(units):
+    """
+    SQL condition on OrgUnit.path matching every unit at or below the given ones.
+    Each unit becomes a range on the path index: '/1/4/' <= path < '/1/40'
+    ('0' is the character right after the '/' separator in byte order, which
+    the column's collation guarantees; see models.ORG_PATH).
+    """
+    if not units:
+        return false()
+    return or_(*[and_(OrgUnit.path >= unit.path, OrgUnit.path < unit.path[:-1] + '0')
+                 for unit in units])
+
+
+def subtree_employee_filter(units):
+    """Employee filter for everyone sitting in the given units or anywhere below them."""
+    return Employee.org_unit_id.in_(select(OrgUnit.id).where(subtree_condition(units)))
+
+
+def get_subtree_units(units):
+    """Every unit at or below the given ones, ordered by name."""
+    return OrgUnit.query.filter(subtree_condition(units)).order_by(OrgUnit.name).all()
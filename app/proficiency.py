@@ -0,0 +1,57 @@
+import pandas as pd
+
+# "Level 2: Advanced" -> 2; anything else ("Not Selected", blanks) has no level
+LEVEL_PATTERN = r'Level\s*(\d+)'
+
+GAP_UNDER = 'Under-Skilled'
+GAP_ON_TARGET = 'On-Target'
+
+# Current-gap severity (expected minus actual level) -> report priority
+PRIORITY_THRESHOLDS = {'high': 3, 'medium': 2, 'low': 1}
+
+
+def priority_label(severity):
+    """'High', 'Medium' or 'Low' for a gap severity (or an average of them); None when on target."""
+    if not severity:
+        return None
+    if severity >= PRIORITY_THRESHOLDS['high']:
+        return 'High'
+    if severity >= PRIORITY_THRESHOLDS['medium']:
+        return 'Medium'
+    return 'Low'
+
+
+def parse_levels(series):
+    """Numeric levels of a Series of proficiency strings (nullable Int8; NA where there is none)."""
+    return series.str.extract(LEVEL_PATTERN, expand=False).astype('Int8')
+
+
+def gap_severity(actual, expected):
+    """
+    Levels short of the expected proficiency, floored at 0.
+    No expectation means no severity (NA); no recorded proficiency counts as level 0.
+    """
+    return (expected - actual.fillna(0)).clip(lower=0).astype('Int8')
+
+
+def apply_levels_and_gaps(frame):
+    """
+    Add integer level and severity columns to a frame of skill rows and derive
+    gap_current/gap_future from them, for the whole chunk at once.
+    Rows without an expected level keep the gap text they came with, and
+    their severity follows it (1 for Under-Skilled, else 0), so counts by
+    text and by severity agree.
+    """
+    frame['user_level'] = parse_levels(frame['user_proficiency'])
+    frame['expected_current_level'] = parse_levels(frame['expected_current_prof'])
+    frame['expected_future_level'] = parse_levels(frame['expected_future_prof'])
+
+    for horizon in ('current', 'future'):
+        severity = gap_severity(frame['user_level'], frame[f'expected_{horizon}_level'])
+        computed = pd.Series(GAP_ON_TARGET, index=frame.index).where(severity.fillna(0) == 0, GAP_UNDER)
+        frame[f'gap_{horizon}'] = computed.where(severity.notna(), frame[f'gap_{horizon}'])
+
+        text_severity = (frame[f'gap_{horizon}'] == GAP_UNDER).astype('Int8')
+        frame[f'gap_{horizon}_severity'] = severity.fillna(text_severity)
+
+    return frame
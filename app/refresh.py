@@ -0,0 +1,239 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import click
+import pandas as pd
+from flask import current_app
+from app import db
+from app.importer import EMPLOYEE_COLUMNS, check_columns, timed_stage, skill_frame, upsert_employees, \
+    delta_state, apply_skill_delta, delete_stale_skills, rebuild_derived_data
+from app.models import DataImportLog
+
+try:
+    import fcntl
+except ImportError: # not on Windows, where only runs within one process are kept apart
+    fcntl = None
+
+REFRESH_BY = 'Nightly refresh'
+
+# Where loaded and rejected files are moved, under the drop directory
+PROCESSED_DIR = 'processed'
+FAILED_DIR = 'failed'
+
+_run_lock = threading.Lock()
+
+
+def discover_files(drop_dir):
+    """CSV files waiting in the drop directory, in name order (later files win on conflicts)."""
+    if not os.path.isdir(drop_dir):
+        return []
+    return sorted(entry.path for entry in os.scandir(drop_dir)
+                  if entry.is_file() and entry.name.lower().endswith('.csv'))
+
+
+def parse_file(path):
+    """
+    Worker-process entry point: read and validate one dropped CSV and
+    compute its skill rows (levels, gaps, fingerprints). Needs no app or
+    database. Returns (employee columns, skill_frame).
+    """
+    df = pd.read_csv(path, dtype=str)
+    check_columns(df.columns)
+    df = df[df['NBK'].notna()]
+    return df[list(EMPLOYEE_COLUMNS)], skill_frame(df)
+
+
+def _parse_files(paths, workers):
+    """Parse files in a process pool: ({path: parsed frames}, {path: error message})."""
+    parsed, errors = {}, {}
+    if workers <= 1:
+        for path in paths:
+            try:
+                parsed[path] = parse_file(path)
+            except Exception as e:
+                errors[path] = f'{os.path.basename(path)}: {e}'
+        return parsed, errors
+
+    # spawn, not fork: workers must not inherit the parent's DB connections or threads
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {path: pool.submit(parse_file, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                parsed[path] = future.result()
+            except Exception as e:
+                errors[path] = f'{os.path.basename(path)}: {e}'
+    return parsed, errors
+
+
+def _load(parsed, log, chunksize):
+    """
+    Apply every parsed file as a delta import, without committing: the
+    caller commits once, so readers see the old data until the whole
+    refresh is in.
+    """
+    state = delta_state()
+    for employees, skills in parsed.values():
+        for start in range(0, len(employees), chunksize):
+            upsert_employees(employees.iloc[start:start + chunksize])
+        for start in range(0, len(skills), chunksize):
+            inserted, updated = apply_skill_delta(skills.iloc[start:start + chunksize], state)
+            log.inserted_count += inserted
+            log.updated_count += updated
+        log.row_count += len(skills)
+    log.deleted_count = delete_stale_skills(state)
+
+
+def _move(path, folder):
+    """Move a handled file into a subfolder of its drop directory, stamped so names never clash."""
+    target_dir = os.path.join(os.path.dirname(path), folder)
+    os.makedirs(target_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    os.replace(path, os.path.join(target_dir, f'{stamp}_{os.path.basename(path)}'))
+
+
+@contextmanager
+def _exclusive_run(drop_dir):
+    """
+    Hold the refresh lock for a drop directory: yields False when another
+    run (in this process, or another one on the host) already holds it.
+    """
+    if not _run_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(drop_dir, exist_ok=True)
+        with open(os.path.join(drop_dir, '.refresh.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            yield True
+    finally:
+        _run_lock.release()
+
+
+def run_refresh(drop_dir=None, imported_by=REFRESH_BY):
+    """
+    One data refresh: pick up the CSVs waiting in the drop directory, parse
+    and validate them in parallel (REFRESH_WORKERS processes), then load them
+    as a delta and rebuild derived data in a single transaction. Files that
+    fail validation are moved to failed/ and the rest still load; loaded
+    files are moved to processed/ once the transaction is committed. Stage timings land in the DataImportLog.
+    Returns the log, or None when no files were waiting or a run is already going.
+    """
+    config = current_app.config
+    drop_dir = drop_dir or config['REFRESH_DROP_DIR']
+
+    with _exclusive_run(drop_dir) as acquired:
+        if not acquired:
+            return None
+
+        started = time.perf_counter()
+        paths = discover_files(drop_dir)
+        if not paths:
+            return None
+        log = DataImportLog(imported_by=imported_by, mode='delta', status='In Progress',
+                            filename=', '.join(os.path.basename(path) for path in paths)[:100],
+                            row_count=0, inserted_count=0, updated_count=0, deleted_count=0,
+                            stage_timings={'discover': round(time.perf_counter() - started, 3)})
+        db.session.add(log)
+        db.session.commit()
+
+        with timed_stage(log, 'parse'):
+            parsed, errors = _parse_files(paths, config['REFRESH_WORKERS'])
+
+        try:
+            with timed_stage(log, 'load'):
+                _load(parsed, log, config['IMPORT_CHUNK_SIZE'])
+            log.status = ('Failed' if not parsed else 'Partial') if errors else 'Success'
+            log.error_message = '; '.join(errors.values()) or None
+            # Commits the load and the derived data in one go
+            if log.inserted_count or log.updated_count or log.deleted_count:
+                rebuild_derived_data(log)
+            else:
+                db.session.commit()
+        except Exception as e:
+            stage_timings = log.stage_timings
+            db.session.rollback()
+            # Nothing was loaded; the files stay in place for the next run
+            log.stage_timings = stage_timings
+            log.status = 'Failed'
+            log.error_message = str(e)
+            log.row_count = log.inserted_count = log.updated_count = log.deleted_count = 0
+            db.session.commit()
+            current_app.logger.exception('Refresh of %s failed', drop_dir)
+            return log
+
+        for path in parsed:
+            _move(path, PROCESSED_DIR)
+        for path in errors:
+            _move(path, FAILED_DIR)
+
+        log.stage_timings = dict(log.stage_timings, total=round(time.perf_counter() - started, 3))
+        db.session.commit()
+        return log
+
+
+def seconds_until(at, now=None):
+    """Seconds from now until the next occurrence of a local 'HH:MM' time."""
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in at.split(':'))
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def start_refresh_scheduler(app, drop_dir=None):
+    """Daemon thread that runs run_refresh every day at REFRESH_TIME."""
+    def loop():
+        while True:
+            time.sleep(seconds_until(app.config['REFRESH_TIME']))
+            with app.app_context():
+                try:
+                    run_refresh(drop_dir)
+                except Exception:
+                    app.logger.exception('Scheduled refresh failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=loop, name='refresh-scheduler', daemon=True)
+    thread.start()
+    return thread
+
+
+def init_refresh(app):
+    """Register `flask refresh`, and start the in-process scheduler when REFRESH_SCHEDULER is set."""
+
+    @app.cli.command('refresh')
+    @click.option('--drop-dir', default=None, help='Directory to pick CSV files up from (default: REFRESH_DROP_DIR).')
+    @click.option('--schedule', is_flag=True, help='Keep running and refresh every day at REFRESH_TIME.')
+    def refresh_command(drop_dir, schedule):
+        """Load the CSV files waiting in the drop directory and rebuild derived data."""
+        if schedule:
+            click.echo(f"Refreshing every day at {app.config['REFRESH_TIME']}; Ctrl+C to stop.")
+            start_refresh_scheduler(app, drop_dir).join()
+            return
+
+        log = run_refresh(drop_dir)
+        if log is None:
+            click.echo('No files to load (or a refresh is already running).')
+            return
+        click.echo(f'{log.status}: {log.row_count} rows from {log.filename} '
+                   f'({log.inserted_count} added, {log.updated_count} changed, {log.deleted_count} removed)')
+        if log.error_message:
+            click.echo(f'Error: {log.error_message}')
+        click.echo('Stage timings: ' + ', '.join(f'{stage} {seconds:.2f}s'
+                                                  for stage, seconds in log.stage_timings.items()))
+
+    if app.config['REFRESH_SCHEDULER']:
+        start_refresh_scheduler(app)
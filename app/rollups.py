@@ -0,0 +1,48 @@
+from datetime import datetime
+from sqlalchemy import insert, delete
+from app import db
+from app.models import GapRollup
+from app.org_units import LEVEL_COLUMNS
+from app.snapshot import build_snapshot
+
+
+# Summed per org unit on top of headcount
+ROLLUP_TOTALS = ['total_skills', 'current_gaps', 'future_gaps',
+                 'high_priority_gaps', 'medium_priority_gaps', 'low_priority_gaps']
+
+
+def refresh_rollups(snapshot=None):
+    """
+    Rebuild gap_rollups from the columnar skills snapshot (built from the
+    database when none is passed): per-employee totals summed by leader name
+    at each level. Does not commit: it runs inside the import's transaction.
+    """
+    snapshot = snapshot or build_snapshot()
+    refreshed_at = datetime.utcnow()
+    rows = [dict(level=level, name=name, refreshed_at=refreshed_at, **totals)
+            for level in LEVEL_COLUMNS
+            for name, totals in snapshot.level_totals(level).items()]
+
+    db.session.execute(delete(GapRollup))
+    if rows:
+        db.session.execute(insert(GapRollup), rows)
+
+
+def get_rollup(level, name):
+    """
+    Precomputed totals for one org unit as a dict.
+    Units with no rows (unknown name, or before the first import) read as zeros.
+    """
+    rollup = GapRollup.query.filter_by(level=level, name=name).first()
+    fields = ['headcount'] + ROLLUP_TOTALS
+    if not rollup:
+        return dict.fromkeys(fields, 0)
+
+    return {field: getattr(rollup, field) or 0 for field in fields}
+
+
+def gap_percentage(rollup):
+    """Share of tracked skills currently under target, as a whole percent."""
+    if not rollup['total_skills']:
+        return 0
+    return round(rollup['current_gaps'] / rollup['total_skills'] * 100)
@@ -0,0 +1,214 @@
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import select, insert, delete, and_
+from app import db
+from app.models import Employee, OrgUnit, SearchDocument, SearchPosting
+from app.org_units import HIERARCHY_LEVELS, LEVEL_COLUMNS, _name_path
+
+# Letters and digits in any script; everything else separates words
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# Posting lists are stored as packed little-endian int32 document ids
+DOC_ID_DTYPE = np.dtype('<i4')
+
+# Posting ids a search may read: trigrams are taken rarest first until the
+# next one would exceed this, so grams most of the org shares ('emp', ' jo')
+# cost nothing
+SEARCH_POSTINGS_BUDGET = 50000
+
+# Best-matching employees (by shared trigrams) that get fully scored
+SEARCH_CANDIDATES = 50
+
+SEARCH_LIMIT = 20
+
+# Share of the query's trigrams a field must contain to count as a match
+MIN_SIMILARITY = 0.5
+
+# Score multiplier for matches on the manager's name, so an employee's own
+# name, NBK or email outranks their team's
+MANAGER_WEIGHT = 0.8
+
+# Per field, in _search_fields order
+FIELD_WEIGHTS = (1.0, 1.0, 1.0, MANAGER_WEIGHT)
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word):
+    padded = f'  {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(text):
+    """
+    Distinct trigrams of the words in text, lowercased and padded the way
+    pg_trgm does it ('Ann' -> '  a', ' an', 'ann', 'nn ').
+    """
+    grams = set()
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        grams |= _word_trigrams(word)
+    return grams
+
+
+def _search_fields(name, nbk, email, manager_name):
+    return [name, nbk, email, manager_name if manager_name != 'N/A' else None]
+
+
+def _pack(doc_ids):
+    return np.array(doc_ids, dtype=DOC_ID_DTYPE).tobytes()
+
+
+def _unpack(postings):
+    if not postings:
+        return np.empty(0, dtype=DOC_ID_DTYPE)
+    return np.concatenate([np.frombuffer(doc_ids, dtype=DOC_ID_DTYPE) for doc_ids in postings])
+
+
+def rebuild_search_index():
+    """
+    Rebuild the people-search tables from employees. Documents are numbered
+    in org path order and each trigram's ids are written as one packed row,
+    so a rebuild inserts one row per employee plus one per distinct trigram.
+    Does not commit: it runs inside the import's transaction.
+    """
+    people = db.session.execute(
+        select(Employee.name, Employee.nbk, Employee.email, Employee.manager_name, OrgUnit.path)
+        .outerjoin(OrgUnit, OrgUnit.id == Employee.org_unit_id)
+    ).all()
+    people.sort(key=lambda person: (person.path or '', person.nbk))
+
+    documents = []
+    postings = defaultdict(list)
+    manager_postings = defaultdict(list)
+    for doc_id, person in enumerate(people, start=1):
+        documents.append({'id': doc_id, 'employee_nbk': person.nbk, 'path': person.path or ''})
+        *own_fields, manager_name = _search_fields(person.name, person.nbk, person.email, person.manager_name)
+        own_grams = trigrams(' '.join(field for field in own_fields if field))
+        for gram in own_grams:
+            postings[gram].append(doc_id)
+        for gram in trigrams(manager_name) - own_grams:
+            manager_postings[gram].append(doc_id)
+
+    db.session.execute(delete(SearchPosting))
+    db.session.execute(delete(SearchDocument))
+    if documents:
+        db.session.execute(insert(SearchDocument.__table__), documents)
+        db.session.execute(insert(SearchPosting.__table__), [
+            {'gram': gram,
+             'doc_count': len(postings[gram]) + len(manager_postings[gram]),
+             'doc_ids': _pack(postings[gram]),
+             'manager_doc_ids': _pack(manager_postings[gram])}
+            for gram in postings.keys() | manager_postings.keys()
+        ])
+
+
+def _scope_ranges(units):
+    """
+    Inclusive document id range of everyone under each unit. Ids follow path
+    order (byte order, as the rebuild sorts and models.ORG_PATH collates),
+    so a subtree's first and last documents bound it (two index seeks).
+    """
+    ranges = []
+    for unit in units:
+        in_subtree = and_(SearchDocument.path >= unit.path, SearchDocument.path < unit.path[:-1] + '0')
+        first = select(SearchDocument.id).where(in_subtree) \
+            .order_by(SearchDocument.path, SearchDocument.id).limit(1)
+        last = select(SearchDocument.id).where(in_subtree) \
+            .order_by(SearchDocument.path.desc(), SearchDocument.id.desc()).limit(1)
+        lo, hi = db.session.execute(select(first.scalar_subquery(), last.scalar_subquery())).one()
+        if lo is not None:
+            ranges.append((lo, hi))
+    return ranges
+
+
+def _candidate_doc_ids(query_grams, units):
+    """Ids of the documents sharing the most of the query's rarer trigrams, capped at SEARCH_CANDIDATES."""
+    doc_counts = db.session.execute(
+        select(SearchPosting.gram, SearchPosting.doc_count).where(SearchPosting.gram.in_(query_grams))
+    ).all()
+    selected, total = [], 0
+    for gram, doc_count in sorted(doc_counts, key=lambda row: row.doc_count):
+        if selected and total + doc_count > SEARCH_POSTINGS_BUDGET:
+            break
+        selected.append(gram)
+        total += doc_count
+    if not selected:
+        return []
+
+    postings = db.session.execute(
+        select(SearchPosting.doc_ids, SearchPosting.manager_doc_ids).where(SearchPosting.gram.in_(selected))
+    ).all()
+    own = _unpack([row.doc_ids for row in postings])
+    manager = _unpack([row.manager_doc_ids for row in postings])
+    size = max(own.max(initial=0), manager.max(initial=0)) + 1
+    # Shared trigrams per document, weighted the way _field_score weighs the fields
+    hits = np.bincount(own, minlength=size) + MANAGER_WEIGHT * np.bincount(manager, minlength=size)
+    if units is not None:
+        in_scope = np.zeros(len(hits), dtype=bool)
+        for lo, hi in _scope_ranges(units):
+            in_scope[lo:hi + 1] = True
+        hits[~in_scope] = 0
+
+    # No single field can cover more of the query than all fields together,
+    # and a skipped common gram may match anyone, so documents with fewer
+    # hits than this cannot reach MIN_SIMILARITY
+    skipped = len(doc_counts) - len(selected)
+    min_hits = max(MIN_SIMILARITY * len(query_grams) - skipped, MANAGER_WEIGHT)
+    candidates = np.flatnonzero(hits >= min_hits)
+    if len(candidates) > SEARCH_CANDIDATES:
+        best = np.argpartition(-hits[candidates], SEARCH_CANDIDATES)[:SEARCH_CANDIDATES]
+        candidates = candidates[best]
+    return candidates.tolist()
+
+
+def _field_score(query_grams, text, weight):
+    """(share of the query's trigrams found in text, trigram overlap with the whole text), weighted."""
+    grams = trigrams(text)
+    shared = len(query_grams & grams)
+    if not shared:
+        return (0, 0)
+    return (weight * shared / len(query_grams), weight * shared / len(query_grams | grams))
+
+
+def search_people(query, units=None, limit=SEARCH_LIMIT):
+    """
+    Ranked fuzzy matches for a query over name, NBK, email and manager name,
+    optionally restricted to employees under the given org units.
+    Each match carries its org path (GDL down to manager) and a 0-1 score.
+    """
+    query_grams = trigrams(query)
+    if not query_grams:
+        return []
+
+    doc_ids = _candidate_doc_ids(query_grams, units)
+    if not doc_ids:
+        return []
+
+    level_columns = [LEVEL_COLUMNS[level] for level in HIERARCHY_LEVELS]
+    people = db.session.execute(
+        select(Employee.name, Employee.nbk, Employee.email, Employee.manager_name,
+               Employee.role, *level_columns)
+        .join(SearchDocument, SearchDocument.employee_nbk == Employee.nbk)
+        .where(SearchDocument.id.in_(doc_ids))
+    ).all()
+
+    ranked = []
+    for person in people:
+        fields = _search_fields(person.name, person.nbk, person.email, person.manager_name)
+        score = max(_field_score(query_grams, field, weight) for field, weight in zip(fields, FIELD_WEIGHTS))
+        if score[0] < MIN_SIMILARITY:
+            continue
+        ranked.append((score, person))
+    ranked.sort(key=lambda item: (-item[0][0], -item[0][1], item[1].name))
+
+    return [{
+        'nbk': person.nbk,
+        'name': person.name,
+        'email': person.email,
+        'role': person.role,
+        'manager': person.manager_name,
+        'org_path': list(_name_path(person[-len(level_columns):])),
+        'score': round(score[0], 2),
+    } for score, person in ranked[:limit]]
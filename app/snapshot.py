@@ -0,0 +1,314 @@
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.data_version import get_data_version
+from app.models import Employee, OrgUnit, Skill
+from app.org_units import HIERARCHY_LEVELS, LEVEL_COLUMNS
+from app.proficiency import PRIORITY_THRESHOLDS
+
+# Skill rows fetched per round trip while building a snapshot
+SNAPSHOT_FETCH_SIZE = 50000
+
+# Per-employee totals, summed from the skill rows when the snapshot is built
+EMPLOYEE_TOTALS = ['total_skills', 'current_gaps', 'future_gaps',
+                   'high_priority_gaps', 'medium_priority_gaps', 'low_priority_gaps']
+
+# Every array a snapshot is made of, as persisted (one .npy file each)
+SNAPSHOT_ARRAYS = (
+    # Skill rows: skill name code, employee index, current/future gap severity
+    # (0 when on target) and the employee's level (-1 when unknown)
+    ['skill_names', 'skill_code', 'skill_employee', 'skill_current', 'skill_future', 'skill_level']
+    # Employees in NBK order: org unit index (-1 for none), name code at each
+    # hierarchy level (-1 for none/'N/A') and their skill totals
+    + ['nbks', 'employee_unit'] + [f'employee_{level}' for level in HIERARCHY_LEVELS]
+    + [f'employee_{total}' for total in EMPLOYEE_TOTALS]
+    # Org units in path order, and the names the level codes point into
+    + ['unit_ids', 'unit_levels', 'unit_paths', 'level_names']
+)
+
+
+class SkillSnapshot:
+    """
+    Read-only columnar copy of the skills table: one NumPy array per column,
+    with skill names, employees, org units and leader names stored as integer
+    codes, so aggregates are bincounts instead of row-by-row ORM work.
+    """
+
+    def __init__(self, **arrays):
+        for name in SNAPSHOT_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def scope_employees(self, units):
+        """Boolean mask over employees sitting in the given units or anywhere below them."""
+        in_scope = np.zeros(len(self.unit_paths) + 1, dtype=bool)
+        for unit in units:
+            in_scope[:-1] |= np.char.startswith(self.unit_paths, unit.path)
+        # Index -1 (no unit) lands on the trailing False
+        return in_scope[self.employee_unit]
+
+    def skill_totals(self, employee_mask):
+        """
+        Per skill name code, over the skill rows of the masked employees:
+        holders, current/future gap counts, summed current severity and high priority gaps.
+        """
+        rows = employee_mask[self.skill_employee] & (self.skill_code >= 0)
+        codes = self.skill_code[rows]
+        current = self.skill_current[rows]
+
+        def count(weights=None):
+            return np.bincount(codes, weights, minlength=len(self.skill_names)).astype(np.int64)
+
+        return {
+            'holders': count(),
+            'current_gaps': count(current > 0),
+            'future_gaps': count(self.skill_future[rows] > 0),
+            'severity': count(current),
+            'high_priority_gaps': count(current >= PRIORITY_THRESHOLDS['high']),
+        }
+
+    def child_skill_totals(self, employee_mask, child_level, skill_names):
+        """
+        Holders and current gaps of the given skills per name at child_level,
+        over the masked employees: ({name: (holders, gaps) arrays in skill_names order}).
+        """
+        # Skill code -> position in skill_names, -1 for skills not asked for
+        positions = np.full(len(self.skill_names) + 1, -1)
+        for position, name in enumerate(skill_names):
+            code = np.searchsorted(self.skill_names, name)
+            if code < len(self.skill_names) and self.skill_names[code] == name:
+                positions[code] = position
+
+        rows = employee_mask[self.skill_employee]
+        row_children = getattr(self, f'employee_{child_level}')[self.skill_employee[rows]]
+        row_positions = positions[self.skill_code[rows]]
+        current = self.skill_current[rows]
+        rows = (row_children >= 0) & (row_positions >= 0)
+
+        keys = row_children[rows] * len(skill_names) + row_positions[rows]
+        size = len(self.level_names) * len(skill_names)
+        holders = np.bincount(keys, minlength=size).reshape(-1, len(skill_names))
+        gaps = np.bincount(keys, current[rows] > 0, minlength=size) \
+            .astype(np.int64).reshape(-1, len(skill_names))
+
+        return {str(self.level_names[code]): (holders[code], gaps[code])
+                for code in np.flatnonzero(holders.any(axis=1))}
+
+    def level_totals(self, level):
+        """Headcount and EMPLOYEE_TOTALS per name at one hierarchy level: {name: {field: count}}."""
+        codes = getattr(self, f'employee_{level}')
+        named = codes >= 0
+        codes = codes[named]
+        size = len(self.level_names)
+        headcount = np.bincount(codes, minlength=size)
+        totals = {total: np.bincount(codes, getattr(self, f'employee_{total}')[named], minlength=size)
+                  .astype(np.int64) for total in EMPLOYEE_TOTALS}
+        return {
+            str(self.level_names[code]): dict(headcount=int(headcount[code]),
+                                              **{total: int(totals[total][code]) for total in EMPLOYEE_TOTALS})
+            for code in np.flatnonzero(headcount)
+        }
+
+    def team_totals(self, units):
+        """
+        Headcount, skills, current gaps and future gaps of every manager's team
+        at or below the given units: {manager unit id: (headcount, skills, gaps, future gaps)}.
+        """
+        team_units = np.zeros(len(self.unit_ids) + 1, dtype=bool)
+        team_units[:-1] = self.unit_levels == 'manager'
+        employees = self.scope_employees(units) & team_units[self.employee_unit]
+
+        units_of = self.employee_unit[employees]
+        size = len(self.unit_ids)
+        headcount = np.bincount(units_of, minlength=size)
+        sums = [np.bincount(units_of, getattr(self, f'employee_{total}')[employees], minlength=size)
+                .astype(np.int64) for total in ('total_skills', 'current_gaps', 'future_gaps')]
+        return {int(self.unit_ids[index]): (int(headcount[index]), *(int(s[index]) for s in sums))
+                for index in np.flatnonzero(headcount)}
+
+    def save(self, directory):
+        """
+        Write every array as .npy under directory, renamed into place in one
+        step. When another process got there first its copy is kept, as
+        both hold the same version.
+        """
+        tmp_directory = f'{directory}.{os.getpid()}.tmp'
+        os.makedirs(tmp_directory, exist_ok=True)
+        for name in SNAPSHOT_ARRAYS:
+            np.save(os.path.join(tmp_directory, f'{name}.npy'), getattr(self, name))
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a snapshot written by save; None when there is none."""
+        try:
+            return cls(**{name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                          for name in SNAPSHOT_ARRAYS})
+        except (OSError, ValueError):
+            return None
+
+
+def _fixed_width(values):
+    """Strings as a fixed-width unicode array, which (unlike object arrays) can be memory-mapped."""
+    return np.array(values, dtype=str) if len(values) else np.empty(0, dtype='<U1')
+
+
+def build_snapshot():
+    """
+    Build a SkillSnapshot from the database. Skill rows are streamed in
+    SNAPSHOT_FETCH_SIZE batches and coded as they arrive, so only the arrays
+    are ever held in full.
+    """
+    level_columns = [LEVEL_COLUMNS[level] for level in HIERARCHY_LEVELS]
+    # Core rows straight off the connection; the ORM adds nothing for plain columns
+    connection = db.session.connection()
+    employees = pd.DataFrame(connection.execute(
+        select(Employee.nbk, Employee.org_unit_id, *level_columns).order_by(Employee.nbk)
+    ).all(), columns=['nbk', 'org_unit_id'] + HIERARCHY_LEVELS)
+    units = pd.DataFrame(connection.execute(
+        select(OrgUnit.id, OrgUnit.level, OrgUnit.path).order_by(OrgUnit.path)
+    ).all(), columns=['id', 'level', 'path'])
+
+    # One name table for all levels; 'N/A' and blanks read as no leader
+    names = employees[HIERARCHY_LEVELS].where(employees[HIERARCHY_LEVELS] != 'N/A')
+    name_codes, level_names = pd.factorize(names.to_numpy().ravel(), sort=True)
+    name_codes = name_codes.reshape(names.shape).astype(np.int32)
+
+    unit_index = pd.Index(units['id'])
+    unit_ids = employees['org_unit_id'].fillna(-1).astype(np.int64)
+    employee_index = pd.Index(employees['nbk'])
+
+    codes, employee_rows, current, future, levels = [], [], [], [], []
+    skill_names = {}
+    result = connection.execute(
+        select(Skill.employee_nbk, Skill.skill_name, Skill.gap_current_severity, Skill.gap_future_severity,
+               Skill.user_level)
+        .execution_options(yield_per=SNAPSHOT_FETCH_SIZE)
+    )
+    for partition in result.partitions():
+        nbks, names_batch, current_batch, future_batch, level_batch = zip(*partition)
+        batch_codes, uniques = pd.factorize(pd.Series(names_batch, dtype=object))
+        lookup = np.array([skill_names.setdefault(name, len(skill_names)) for name in uniques] + [-1],
+                          dtype=np.int32)
+        codes.append(lookup[batch_codes])
+        employee_rows.append(employee_index.get_indexer(pd.Series(nbks, dtype=object)).astype(np.int32))
+        current.append(pd.Series(current_batch, dtype=float).fillna(0).clip(lower=0).to_numpy(np.int8))
+        future.append(pd.Series(future_batch, dtype=float).fillna(0).clip(lower=0).to_numpy(np.int8))
+        levels.append(pd.Series(level_batch, dtype=float).fillna(-1).to_numpy(np.int8))
+
+    def joined(parts, dtype):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    skill_code = joined(codes, np.int32)
+    skill_employee = joined(employee_rows, np.int32)
+    skill_current = joined(current, np.int8)
+    skill_future = joined(future, np.int8)
+    skill_level = joined(levels, np.int8)
+
+    # Renumber skill names in sorted order, so code order is name order
+    ordered = sorted(skill_names)
+    rank = np.empty(len(ordered) + 1, dtype=np.int32)
+    rank[[skill_names[name] for name in ordered]] = np.arange(len(ordered), dtype=np.int32)
+    rank[-1] = -1
+    skill_code = rank[skill_code]
+
+    known = skill_employee >= 0
+    size = len(employees)
+    owners = skill_employee[known]
+    current_known = skill_current[known]
+
+    def per_employee(weights=None):
+        return np.bincount(owners, weights, minlength=size).astype(np.int32)
+
+    arrays = {
+        'skill_names': _fixed_width(ordered),
+        'skill_code': skill_code,
+        'skill_employee': skill_employee,
+        'skill_current': skill_current,
+        'skill_future': skill_future,
+        'skill_level': skill_level,
+        'nbks': _fixed_width(employees['nbk'].tolist()),
+        'employee_unit': unit_index.get_indexer(unit_ids).astype(np.int32),
+        'employee_total_skills': per_employee(),
+        'employee_current_gaps': per_employee(current_known > 0),
+        'employee_future_gaps': per_employee(skill_future[known] > 0),
+        'employee_high_priority_gaps': per_employee(current_known >= PRIORITY_THRESHOLDS['high']),
+        'employee_medium_priority_gaps': per_employee(current_known == PRIORITY_THRESHOLDS['medium']),
+        'employee_low_priority_gaps': per_employee(current_known == PRIORITY_THRESHOLDS['low']),
+        'unit_ids': units['id'].to_numpy(np.int64),
+        'unit_levels': _fixed_width(units['level'].tolist()),
+        'unit_paths': _fixed_width(units['path'].tolist()),
+        'level_names': _fixed_width(list(level_names)),
+    }
+    for depth, level in enumerate(HIERARCHY_LEVELS):
+        arrays[f'employee_{level}'] = name_codes[:, depth].copy()
+    return SkillSnapshot(**arrays)
+
+
+def init_snapshot(app):
+    """Per-process holder for the current snapshot; filled lazily by get_snapshot."""
+    app.extensions['skill_snapshot'] = {'version': None, 'snapshot': None, 'lock': threading.Lock()}
+
+
+def _snapshot_directory(version):
+    directory = current_app.config['SKILL_SNAPSHOT_DIR']
+    return os.path.join(directory, f'v{version}') if directory else None
+
+
+def persist_snapshot(snapshot, version):
+    """
+    Write a freshly built snapshot to SKILL_SNAPSHOT_DIR (when set) for
+    other workers to map. Called before the import commits the version, so
+    no worker looks for it yet; a copy left by an import that rolled back
+    is replaced.
+    """
+    directory = _snapshot_directory(version)
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        snapshot.save(directory)
+
+
+def publish_snapshot(snapshot, version):
+    """
+    Make a snapshot current for this process once its version is committed,
+    and remove persisted snapshots of older versions.
+    """
+    directory = _snapshot_directory(version)
+    if directory and os.path.isdir(os.path.dirname(directory)):
+        for entry in os.scandir(os.path.dirname(directory)):
+            if entry.is_dir() and entry.path != directory and not entry.name.endswith('.tmp'):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    holder = current_app.extensions['skill_snapshot']
+    with holder['lock']:
+        holder['version'], holder['snapshot'] = version, snapshot
+
+
+def get_snapshot():
+    """
+    The snapshot for the current data version: the one this process holds,
+    else the persisted one (memory-mapped), else built from the database.
+    """
+    version = get_data_version()
+    holder = current_app.extensions['skill_snapshot']
+    with holder['lock']:
+        if holder['version'] == version:
+            return holder['snapshot']
+
+    directory = _snapshot_directory(version)
+    snapshot = SkillSnapshot.load(directory) if directory else None
+    if snapshot is None:
+        snapshot = build_snapshot()
+        if directory:
+            snapshot.save(directory)
+
+    with holder['lock']:
+        holder['version'], holder['snapshot'] = version, snapshot
+    return snapshot
@@ -0,0 +1,131 @@
+import re
+import threading
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.data_version import get_data_version
+from app.models import Employee, Skill, TrainingResource
+from app.proficiency import GAP_UNDER
+
+# Catalogue tier recommended for a gap of at least this many levels, largest first
+GAP_TIERS = [(3, 'New to Role'), (2, 'In Role Development'), (1, 'Mastery')]
+
+# Tier for gaps flagged in the data without a level difference to size them by
+DEFAULT_TIER = 'In Role Development'
+
+
+def normalize_name(name):
+    """Catalogue lookup form of a skill or tier name: case, '&' and punctuation/spacing differences ignored."""
+    name = (name or '').casefold().replace('&', ' and ')
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', name).split())
+
+
+def tier_for_gap(severity):
+    """Catalogue tier for a gap of `severity` levels."""
+    for levels, tier in GAP_TIERS:
+        if severity and severity >= levels:
+            return tier
+    return DEFAULT_TIER
+
+
+def _links(value):
+    """Resource cell (one or more URLs, a line each) as [{'label', 'url'}], schemes added where missing."""
+    return [{'label': line, 'url': line if '://' in line else f'https://{line}'}
+            for line in (line.strip() for line in (value or '').splitlines()) if line]
+
+
+def build_training_index():
+    """The whole training_resources catalogue: {(normalized skill, normalized tier): [links]}."""
+    index = {}
+    for skill_name, tier, url_1, url_2 in db.session.execute(
+        select(TrainingResource.skill_name, TrainingResource.tier,
+               TrainingResource.resource_url_1, TrainingResource.resource_url_2)
+        .order_by(TrainingResource.id)
+    ):
+        index.setdefault((normalize_name(skill_name), normalize_name(tier)), []).extend(_links(url_1) + _links(url_2))
+    return index
+
+
+def init_training_index(app):
+    """Per-process holder for the catalogue index; filled lazily by get_training_index."""
+    app.extensions['training_index'] = {'version': None, 'index': None, 'lock': threading.Lock()}
+
+
+def get_training_index():
+    """The catalogue index for the current data version, rebuilt once after every import."""
+    version = get_data_version()
+    holder = current_app.extensions['training_index']
+    with holder['lock']:
+        if holder['version'] == version:
+            return holder['index']
+
+    index = build_training_index()
+    with holder['lock']:
+        holder['version'], holder['index'] = version, index
+    return index
+
+
+def attach_resources(gap_skills):
+    """Set 'tier' and 'resources' on every gap skill dict (name, severity) from one catalogue index."""
+    index = get_training_index()
+    for skill in gap_skills:
+        skill['tier'] = tier_for_gap(skill['severity'])
+        skill['resources'] = index.get((normalize_name(skill['name']), normalize_name(skill['tier'])), [])
+    return gap_skills
+
+
+def upskill_gaps(skills):
+    """
+    Current and future gap skills of one employee's skill rows, as dicts for
+    the upskill plan (horizon 'current' or 'future'). Skills already short
+    of the current target are not listed again as future gaps.
+    """
+    gap_skills = [{'name': skill.skill_name, 'current': skill.user_proficiency,
+                   'target': skill.expected_current_prof, 'severity': skill.gap_current_severity,
+                   'horizon': 'current'}
+                  for skill in skills if skill.gap_current == GAP_UNDER]
+    current_gap_names = {skill['name'] for skill in gap_skills}
+    future_gap_skills = [{'name': skill.skill_name, 'current': skill.user_proficiency,
+                          'target': skill.expected_future_prof, 'severity': skill.gap_future_severity,
+                          'horizon': 'future'}
+                         for skill in skills
+                         if skill.gap_future == GAP_UNDER and skill.skill_name not in current_gap_names]
+    return gap_skills, future_gap_skills
+
+
+def get_upskill_plan(nbk):
+    """One employee's current and future gap skills, each with its recommended training resources."""
+    skills = Skill.query.filter_by(employee_nbk=nbk).order_by(Skill.id).all()
+    gap_skills, future_gap_skills = upskill_gaps(skills)
+    attach_resources(gap_skills + future_gap_skills)
+    return gap_skills, future_gap_skills
+
+
+def get_team_upskill_plans(manager_name):
+    """
+    Upskill plans of a manager's whole team in bulk: one query for the
+    team's gap skill rows and one pass over the catalogue index. Returns
+    [{'nbk', 'name', 'gap_skills', 'future_gap_skills'}] for team members
+    with gaps, by name.
+    """
+    rows = db.session.execute(
+        select(Employee.nbk, Employee.name, Skill)
+        .join(Skill, Skill.employee_nbk == Employee.nbk)
+        .where(Employee.manager_name == manager_name,
+               (Skill.gap_current == GAP_UNDER) | (Skill.gap_future == GAP_UNDER))
+        .order_by(Employee.name, Employee.nbk, Skill.id)
+    ).all()
+
+    plans, skills_by_nbk = [], {}
+    for nbk, name, skill in rows:
+        if nbk not in skills_by_nbk:
+            skills_by_nbk[nbk] = []
+            plans.append({'nbk': nbk, 'name': name})
+        skills_by_nbk[nbk].append(skill)
+
+    gaps = []
+    for plan in plans:
+        plan['gap_skills'], plan['future_gap_skills'] = upskill_gaps(skills_by_nbk[plan['nbk']])
+        gaps += plan['gap_skills'] + plan['future_gap_skills']
+    attach_resources(gaps)
+    return plans
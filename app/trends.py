@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import select, insert, delete, func, case
+from app import db
+from app.models import Employee, TrainingPlan, ScopeTrend
+from app.org_units import HIERARCHY_LEVELS, LEVEL_COLUMNS
+
+# Training plan status that counts as completed
+PLAN_COMPLETED = 'Completed'
+
+# Values stored per scope and date, besides headcount
+TREND_TOTALS = ['total_skills', 'current_gaps', 'future_gaps', 'high_priority_gaps',
+                'plans_total', 'plans_completed']
+
+# Days of series the reports read by default
+TREND_WINDOW_DAYS = 365
+
+# Downsampling periods: the date each point is bucketed under
+TREND_PERIODS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def _plan_totals():
+    """Training plans and completed plans per name at each hierarchy level: {level: {name: (total, completed)}}."""
+    plans = pd.DataFrame(db.session.execute(
+        select(*[LEVEL_COLUMNS[level] for level in HIERARCHY_LEVELS], func.count(TrainingPlan.id),
+               func.sum(case((TrainingPlan.status == PLAN_COMPLETED, 1), else_=0)))
+        .join(Employee, Employee.nbk == TrainingPlan.employee_nbk)
+        .group_by(*[LEVEL_COLUMNS[level] for level in HIERARCHY_LEVELS])
+    ).all(), columns=HIERARCHY_LEVELS + ['plans_total', 'plans_completed'])
+
+    totals = {}
+    for level in HIERARCHY_LEVELS:
+        named = plans[plans[level].notna() & (plans[level] != 'N/A')]
+        grouped = named.groupby(level)[['plans_total', 'plans_completed']].sum()
+        totals[level] = {name: (int(row.plans_total), int(row.plans_completed))
+                         for name, row in grouped.iterrows()}
+    return totals
+
+
+def record_scope_trends(snapshot, snapshot_date=None):
+    """
+    Append one trend point per org unit dated snapshot_date (today, UTC):
+    headcount and gap totals from the skills snapshot, training plan counts
+    from the database. Replaces the points a refresh earlier the same day
+    wrote. Does not commit: it runs inside the import's transaction.
+    Returns the number of points.
+    """
+    snapshot_date = snapshot_date or datetime.utcnow().date()
+    plans = _plan_totals()
+    rows = []
+    for level in HIERARCHY_LEVELS:
+        for name, totals in snapshot.level_totals(level).items():
+            plans_total, plans_completed = plans[level].get(name, (0, 0))
+            rows.append(dict(level=level, name=name, snapshot_date=snapshot_date,
+                             headcount=totals['headcount'], total_skills=totals['total_skills'],
+                             current_gaps=totals['current_gaps'], future_gaps=totals['future_gaps'],
+                             high_priority_gaps=totals['high_priority_gaps'],
+                             plans_total=plans_total, plans_completed=plans_completed))
+
+    db.session.execute(delete(ScopeTrend).where(ScopeTrend.snapshot_date == snapshot_date))
+    if rows:
+        db.session.execute(insert(ScopeTrend), rows)
+    return len(rows)
+
+
+def completion_rate(point):
+    """Share of a trend point's training plans that are completed, as a whole percent (None without plans)."""
+    if not point['plans_total']:
+        return None
+    return round(point['plans_completed'] / point['plans_total'] * 100)
+
+
+def get_trend_series(level, name, period='week', days=TREND_WINDOW_DAYS, today=None):
+    """
+    A scope's trend points over the last `days` days, oldest first, read
+    with one range scan. Points are downsampled to one per period ('day',
+    'week' or 'month'): the last point recorded in it, dated at the start
+    of the period. Each point also carries its completion rate and the
+    change in current gaps since the previous point.
+    """
+    bucket = TREND_PERIODS[period]
+    today = today or datetime.utcnow().date()
+    rows = db.session.execute(
+        select(ScopeTrend.snapshot_date, ScopeTrend.headcount, *[getattr(ScopeTrend, total) for total in TREND_TOTALS])
+        .where(ScopeTrend.level == level, ScopeTrend.name == name,
+               ScopeTrend.snapshot_date > today - timedelta(days=days),
+               ScopeTrend.snapshot_date <= today)
+        .order_by(ScopeTrend.snapshot_date)
+    ).all()
+
+    # Later points overwrite earlier ones in the same period
+    points = {}
+    for row in rows:
+        points[bucket(row.snapshot_date)] = dict(zip(['headcount'] + TREND_TOTALS, row[1:]))
+
+    series, previous_gaps = [], None
+    for start, point in points.items():
+        point = {field: value or 0 for field, value in point.items()}
+        series.append(dict(point, period=start, completion_rate=completion_rate(point),
+                           gap_change=None if previous_gaps is None else point['current_gaps'] - previous_gaps))
+        previous_gaps = point['current_gaps']
+    return series
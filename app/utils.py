@@ -1,5 +1,11 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import func, case, or_, and_, select
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models import Employee, Skill, Feedback
+from app.models import Employee, Skill, TrainingPlan
 
 def get_employees_by_manager(manager_name):
     """Get all employees reporting to a specific manager."""
@@ -22,6 +28,65 @@ def get_dhs_by_gdl(gdl_name):
     result = db.session.query(Employee.dh_name).filter_by(gdl_name=gdl_name).distinct().all()
     return [r[0] for r in result if r[0] and r[0] != 'N/A']
 
+# Max bind parameters per IN (...) list; keeps us under SQLite's variable limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+def chunked(items, size=IN_CLAUSE_CHUNK_SIZE):
+    """Yield successive slices of a list, for batching large IN lists."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def get_skill_counts(nbks=None, criteria=None, **scope):
+    """
+    Count skills and gaps per employee with a single GROUP BY.
+    Restrict to a list of NBKs (chunked into IN lists), to an Employee scope
+    filter such as dl_name='Robert Zane', to extra SQL criteria on Employee,
+    or any combination.
+    Returns {nbk: {'total_skills': .., 'current_gaps': .., 'future_gaps': ..}}.
+    """
+    query = db.session.query(
+        Skill.employee_nbk,
+        func.count(),
+        func.sum(case((Skill.gap_current_severity > 0, 1), else_=0)),
+        func.sum(case((Skill.gap_future_severity > 0, 1), else_=0))
+    )
+    if scope or criteria:
+        query = query.join(Employee).filter_by(**scope).filter(*(criteria or []))
+    query = query.group_by(Skill.employee_nbk)
+
+    if nbks is None:
+        rows = query.all()
+    else:
+        rows = []
+        for chunk in chunked(list(nbks)):
+            rows.extend(query.filter(Skill.employee_nbk.in_(chunk)).all())
+
+    return {
+        nbk: {
+            'total_skills': total or 0,
+            'current_gaps': current or 0,
+            'future_gaps': future or 0
+        }
+        for nbk, total, current, future in rows
+    }
+
+def summarize_employee(emp, counts=None):
+    """Build the summary dict for one Employee from its skill counts."""
+    counts = counts or {}
+    return {
+        'name': emp.name,
+        'nbk': emp.nbk,
+        'role': emp.role,
+        'function': emp.function_name,
+        'manager': emp.manager_name,
+        'dl': emp.dl_name,
+        'dh': emp.dh_name,
+        'gdl': emp.gdl_name,
+        'total_skills': counts.get('total_skills', 0),
+        'current_gaps': counts.get('current_gaps', 0),
+        'future_gaps': counts.get('future_gaps', 0)
+    }
+
 def get_employee_summary(employees):
     """
     Calculate summary stats for a list of Employee objects.
@@ -30,62 +95,141 @@ def get_employee_summary(employees):
     if not employees:
         return []
 
-    summary_list = []
-    for emp in employees:
-        # Count skills and gaps
-        # We could optimize this with a join or aggregation query, but loop is fine for now
-        skills = Skill.query.filter_by(employee_nbk=emp.nbk).all()
-        
-        total_skills = len(skills)
-        current_gaps = sum(1 for s in skills if s.gap_current == 'Under-Skilled')
-        future_gaps = sum(1 for s in skills if s.gap_future == 'Under-Skilled')
-
-        summary_list.append({
-            'name': emp.name,
-            'nbk': emp.nbk,
-            'role': emp.role,
-            'function': emp.function_name,
-            'manager': emp.manager_name,
-            'dl': emp.dl_name,
-            'dh': emp.dh_name,
-            'gdl': emp.gdl_name,
-            'total_skills': total_skills,
-            'current_gaps': current_gaps,
-            'future_gaps': future_gaps
-        })
-
-    return summary_list
+    counts = get_skill_counts(nbks=[emp.nbk for emp in employees])
+    return [summarize_employee(emp, counts.get(emp.nbk)) for emp in employees]
 
-def get_employee_details_context(nbk):
-    """Helper to get employee details context."""
-    emp = Employee.query.get(nbk)
-    if not emp:
+def get_employee_summary_by_scope(**scope):
+    """
+    Summary stats for every employee matching an Employee scope filter,
+    e.g. get_employee_summary_by_scope(gdl_name='Daniel Hardman').
+    Two queries in total, however large the scope.
+    """
+    employees = Employee.query.filter_by(**scope).all()
+    counts = get_skill_counts(**scope)
+    return [summarize_employee(emp, counts.get(emp.nbk)) for emp in employees]
+
+# Rows per page on the manager dashboard, and the orders it can be sorted in
+TEAM_PAGE_SIZE = 50
+TEAM_SORTS = ('name', 'gaps')
+
+def encode_cursor(values):
+    """Opaque, URL-safe keyset cursor for a page boundary."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    """(sort key, nbk) from encode_cursor, or None for a missing or mangled cursor."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
         return None
+    # Well-formed JSON that is not a cursor (a bare number, a dict, ...) is mangled too
+    if not (isinstance(values, list) and len(values) == 2
+            and all(isinstance(value, (str, int, float)) for value in values)):
+        return None
+    return values
+
+def get_team_page(manager_name, search=None, employee=None, sort='name', after=None, limit=TEAM_PAGE_SIZE):
+    """
+    One page of a manager's team with skill/gap counts, filtered, counted,
+    sorted and paginated in a single SQL query.
+    sort='name' orders by name; sort='gaps' puts the most current gaps first.
+    Pagination is keyset-based: pass the returned next_cursor as after.
+    Returns (summaries, next_cursor or None).
+    """
+    total_skills = func.count(Skill.id)
+    current_gaps = func.coalesce(func.sum(case((Skill.gap_current_severity > 0, 1), else_=0)), 0)
+    future_gaps = func.coalesce(func.sum(case((Skill.gap_future_severity > 0, 1), else_=0)), 0)
+
+    query = db.session.query(Employee, total_skills, current_gaps, future_gaps) \
+        .outerjoin(Skill, Skill.employee_nbk == Employee.nbk) \
+        .filter(Employee.manager_name == manager_name)
+    if search:
+        pattern = f'%{search}%'
+        query = query.filter(or_(Employee.name.ilike(pattern), Employee.nbk.ilike(pattern),
+                                 Employee.role.ilike(pattern)))
+    if employee:
+        query = query.filter(Employee.nbk == employee)
+    query = query.group_by(Employee.nbk)
+
+    # Keyset condition on (sort key, nbk); the nbk tie-breaker keeps pages stable
+    cursor = decode_cursor(after)
+    if sort == 'gaps':
+        if cursor:
+            query = query.having(or_(current_gaps < cursor[0],
+                                     and_(current_gaps == cursor[0], Employee.nbk > cursor[1])))
+        query = query.order_by(current_gaps.desc(), Employee.nbk)
+    else:
+        if cursor:
+            query = query.filter(or_(Employee.name > cursor[0],
+                                     and_(Employee.name == cursor[0], Employee.nbk > cursor[1])))
+        query = query.order_by(Employee.name, Employee.nbk)
+
+    rows = query.limit(limit + 1).all()
+    summaries = [
+        summarize_employee(emp, {'total_skills': skills, 'current_gaps': gaps, 'future_gaps': future})
+        for emp, skills, gaps, future in rows[:limit]
+    ]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = summaries[-1]
+        next_cursor = encode_cursor([last['current_gaps'] if sort == 'gaps' else last['name'], last['nbk']])
+    return summaries, next_cursor
+
+def get_team_options(manager_name):
+    """(nbk, name) of everyone on a manager's team, for filter dropdowns; no skill data loaded."""
+    return db.session.execute(
+        select(Employee.nbk, Employee.name)
+        .where(Employee.manager_name == manager_name)
+        .order_by(Employee.name)
+    ).all()
+
+# Collections every employee details context needs, each loaded for all
+# requested employees with one SELECT ... IN (a JOIN would multiply the rows)
+EMPLOYEE_DETAILS_LOADS = (
+    selectinload(Employee.skills),
+    selectinload(Employee.feedbacks),
+    selectinload(Employee.training_plans).selectinload(TrainingPlan.milestones),
+)
 
-    skills_query = Skill.query.filter_by(employee_nbk=nbk).all()
-    
-    skills = []
-    for skill in skills_query:
-        skills.append({
-            'name': skill.skill_name,
-            'type': skill.skill_type,
-            'category': skill.emp_skill_category,
-            'current_prof': skill.user_proficiency,
-            'expected_prof': skill.expected_current_prof,
-            'gap_current': skill.gap_current,
-            'expected_future': skill.expected_future_prof,
-            'gap_future': skill.gap_future
-        })
-    
-    # Fetch feedbacks
-    feedbacks_query = Feedback.query.filter_by(employee_nbk=nbk).order_by(Feedback.created_at.desc()).all()
+def _employee_details(emp):
+    """Details context of an employee with EMPLOYEE_DETAILS_LOADS loaded, as plain dicts."""
+    skills = [{
+        'name': skill.skill_name,
+        'type': skill.skill_type,
+        'category': skill.emp_skill_category,
+        'current_prof': skill.user_proficiency,
+        'expected_prof': skill.expected_current_prof,
+        'gap_current': skill.gap_current,
+        'expected_future': skill.expected_future_prof,
+        'gap_future': skill.gap_future
+    } for skill in sorted(emp.skills, key=lambda skill: skill.id)]
+
+    # Newest first
     feedbacks = [{
         'given_by': f.given_by,
         'feedback_type': f.feedback_type,
         'content': f.content,
         'date': f.created_at
-    } for f in feedbacks_query]
-    
+    } for f in sorted(emp.feedbacks, key=lambda f: f.created_at or datetime.min, reverse=True)]
+
+    training_plans = [{
+        'skill_name': plan.skill_name,
+        'status': plan.status,
+        'assigned_by': plan.assigned_by,
+        'target_proficiency': plan.target_proficiency,
+        'deadline': plan.deadline,
+        'completion_date': plan.completion_date,
+        'milestones': [{
+            'title': milestone.title,
+            'target_level': milestone.target_level,
+            'deadline': milestone.deadline,
+            'completed': milestone.completed
+        } for milestone in sorted(plan.milestones, key=lambda milestone: milestone.id)]
+    } for plan in sorted(emp.training_plans, key=lambda plan: plan.id)]
+
     # Map Employee object to dict with Capitalized keys to match legacy template expectations
     # This avoids breaking all templates that use {{ employee.Name }} etc.
     employee_dict = {
@@ -100,9 +244,28 @@ def get_employee_details_context(nbk):
         'DHName': emp.dh_name,
         'GDLName': emp.gdl_name
     }
-    
+
     return {
         'employee': employee_dict,
         'skills': skills,
-        'feedbacks': feedbacks
+        'feedbacks': feedbacks,
+        'training_plans': training_plans
     }
+
+def get_employee_details_contexts(nbks):
+    """
+    Details contexts of many employees at once, {nbk: context} (unknown
+    NBKs left out). Takes the same handful of queries however many
+    employees are asked for (per IN_CLAUSE_CHUNK_SIZE of them).
+    """
+    contexts = {}
+    for batch in chunked(list(nbks)):
+        employees = db.session.execute(
+            select(Employee).where(Employee.nbk.in_(batch)).options(*EMPLOYEE_DETAILS_LOADS)
+        ).scalars().all()
+        contexts.update((emp.nbk, _employee_details(emp)) for emp in employees)
+    return contexts
+
+def get_employee_details_context(nbk):
+    """Helper to get employee details context (None for an unknown NBK)."""
+    return get_employee_details_contexts([nbk]).get(nbk)
@@ -0,0 +1,122 @@
+"""
+Query plans and timings for the dashboard access paths, before and after
+the hierarchy/gap indexes.
+
+Builds a throwaway SQLite database with a synthetic org, runs each query
+without the secondary indexes, creates them, and runs the queries again.
+
+    python -m benchmarks.index_plans --employees 20000 --skills-per-employee 15
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select, func, case, text
+
+from app import create_app, db
+from app.config import Config
+from app.importer import import_skills_csv
+from app.models import Employee, Skill
+from benchmarks.synthetic import add_size_arguments, size_arguments, write_csv
+
+
+def access_paths(sample):
+    """The statements the dashboards and reports issue, for one sample employee."""
+    gap_counts = [
+        Skill.employee_nbk,
+        func.count(),
+        func.sum(case((Skill.gap_current_severity > 0, 1), else_=0)),
+        func.sum(case((Skill.gap_future_severity > 0, 1), else_=0)),
+    ]
+    return {
+        'employees in DL scope':
+            select(Employee).where(Employee.dl_name == sample.dl_name),
+        'skill/gap counts for a DH scope':
+            select(*gap_counts).join(Employee).where(Employee.dh_name == sample.dh_name)
+            .group_by(Skill.employee_nbk),
+        'skill/gap counts for an NBK list':
+            select(*gap_counts).where(Skill.employee_nbk.in_([sample.nbk]))
+            .group_by(Skill.employee_nbk),
+        'distinct DHs under a GDL':
+            select(Employee.dh_name).where(Employee.gdl_name == sample.gdl_name).distinct(),
+        'distinct DLs under a DH':
+            select(Employee.dl_name).where(Employee.dh_name == sample.dh_name).distinct(),
+        'distinct managers under a DL':
+            select(Employee.manager_name).where(Employee.dl_name == sample.dl_name).distinct(),
+        'employees by manager':
+            select(Employee).where(Employee.manager_name == sample.manager_name),
+    }
+
+
+def explain(stmt):
+    sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(text(prefix + sql)).all()
+    return [str(row[-1]) for row in rows]
+
+
+def time_query(stmt, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        db.session.execute(stmt).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(paths, runs):
+    return {name: (explain(stmt), time_query(stmt, runs)) for name, stmt in paths.items()}
+
+
+def secondary_indexes():
+    return [index for model in (Employee, Skill) for index in model.__table__.indexes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_size_arguments(parser)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'bench.db')
+    csv_path = os.path.join(workdir, 'bench.csv')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        RESPONSE_CACHE_TYPE = 'null'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        for index in secondary_indexes():
+            index.drop(db.engine)
+
+        print(f"Generating {args.employees} employees x {args.skills_per_employee} skills...")
+        write_csv(csv_path, seed=args.seed, **size_arguments(args))
+        import_skills_csv(csv_path, imported_by='benchmark', mode='append')
+        sample = db.session.get(Employee, f'e{args.employees // 2:07d}')
+        paths = access_paths(sample)
+
+        before = measure(paths, args.runs)
+        for index in secondary_indexes():
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        after = measure(paths, args.runs)
+
+    for name in paths:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        speedup = ms_before / ms_after if ms_after else float('inf')
+        print(f"\n== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms ({speedup:.1f}x)")
+        print("   before: " + " | ".join(plan_before))
+        print("   after:  " + " | ".join(plan_after))
+
+    os.remove(db_path)
+    os.remove(csv_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Latency, SQL statement count and peak Python memory for every role route.
+
+Seeds a throwaway SQLite database from a synthetic org CSV (through the
+real importer), then requests each route through the Flask test client
+with the response and fragment caches disabled. Results are compared with
+the stored baseline; a route is flagged when its median latency grows by
+more than --tolerance (and --min-delta-ms) or it issues more queries than
+before.
+
+    python -m benchmarks.routes --employees 100000 --skills-per-employee 20
+    python -m benchmarks.routes --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import Config
+from app.importer import import_skills_csv
+from app.org_units import get_scope_units
+from benchmarks.synthetic import add_size_arguments, size_arguments, write_csv
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# The first unit at each level of the synthetic org, which every route is scoped to
+SCOPE_NAMES = {'gdl': 'GDL 0', 'dh': 'DH 0', 'dl': 'DL 0', 'manager': 'Manager 0'}
+
+
+def scope_unit_ids():
+    """Org unit id of each scope in SCOPE_NAMES, for the tree children routes."""
+    return {level: get_scope_units(level, name)[0].id for level, name in SCOPE_NAMES.items()}
+
+
+def role_routes(unit_ids):
+    """Every role GET route, scoped to the first unit at each level of the synthetic org."""
+    gdl, dh, dl, manager = (quote(SCOPE_NAMES[level]) for level in ('gdl', 'dh', 'dl', 'manager'))
+    nbk = 'e0000000'
+    query = quote('employe 12')
+    return [
+        f'/employee/dashboard?nbk={nbk}',
+        f'/employee/feedback?nbk={nbk}',
+        f'/employee/upskill-plan?nbk={nbk}',
+        f'/manager/dashboard?manager={manager}',
+        f'/manager/reports?manager={manager}',
+        f'/manager/reports/export.csv?manager={manager}',
+        f'/manager/employee/{nbk}',
+        f'/delivery-lead/dashboard?dl={dl}',
+        f'/delivery-lead/reports?dl={dl}',
+        f'/delivery-lead/reports/export.csv?dl={dl}',
+        f'/delivery-lead/employee/{nbk}',
+        f'/delivery-lead/search?dl={dl}&q={query}',
+        f'/delivery-head/dashboard?dh={dh}',
+        f'/delivery-head/org-units/{unit_ids["dl"]}/children',
+        f'/delivery-head/org-units/{unit_ids["manager"]}/children',
+        f'/delivery-head/reports?dh={dh}',
+        f'/delivery-head/reports/export.csv?dh={dh}',
+        f'/delivery-head/employee/{nbk}',
+        f'/delivery-head/search?dh={dh}&q={query}',
+        f'/group-delivery-lead/dashboard?gdl={gdl}',
+        f'/group-delivery-lead/org-units/{unit_ids["dh"]}/children',
+        f'/group-delivery-lead/org-units/{unit_ids["dl"]}/children',
+        f'/group-delivery-lead/org-units/{unit_ids["manager"]}/children',
+        f'/group-delivery-lead/reports?gdl={gdl}',
+        f'/group-delivery-lead/reports/export.csv?gdl={gdl}',
+        f'/group-delivery-lead/employee/{nbk}',
+        f'/group-delivery-lead/search?gdl={gdl}&q={query}',
+    ]
+
+
+def count_statements(engine):
+    """
+    Running count of statements the engine executes. Unlike X-SQL-Count,
+    this includes the queries a streamed response runs after its headers
+    have gone out.
+    """
+    counter = {'count': 0}
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def count(*args):
+        counter['count'] += 1
+
+    return counter
+
+
+def measure_route(client, url, runs, statements):
+    """Median/max latency (ms), queries per request and peak traced memory (KiB) for one URL."""
+    # Warm-up request so template compilation is not timed. Bodies are read
+    # in full so streamed responses (CSV exports) are generated inside the timing.
+    client.get(url).get_data()
+
+    timings = []
+    for _ in range(runs):
+        before = statements['count']
+        start = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries = statements['count'] - before
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} returned {response.status_code}")
+
+    # Memory is traced on a separate request; tracing slows everything down
+    tracemalloc.start()
+    client.get(url).get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Human-readable regressions of results against a baseline run.
+    Latency must grow by more than both the relative tolerance and
+    min_delta_ms, so millisecond noise on fast routes is not flagged.
+    """
+    regressions = []
+    for url, result in results.items():
+        before = baseline['routes'].get(url)
+        if not before:
+            continue
+        growth = result['median_ms'] - before['median_ms']
+        if growth > before['median_ms'] * tolerance and growth > min_delta_ms:
+            regressions.append(f"{url}: median {before['median_ms']} ms -> {result['median_ms']} ms")
+        if result['queries'] > before['queries']:
+            regressions.append(f"{url}: queries {before['queries']} -> {result['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_size_arguments(parser)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed median latency growth over the baseline (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='ignore latency growth smaller than this many milliseconds')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+    sizes = size_arguments(args)
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'bench.db')
+    csv_path = os.path.join(workdir, 'bench.csv')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        RESPONSE_CACHE_TYPE = 'null'
+        # A zero-entry fragment cache evicts on every set, so each request renders in full
+        FRAGMENT_CACHE_MAX_ENTRIES = 0
+        SQL_INSTRUMENTATION = True
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        print(f"Generating {sizes['employees']} employees x {sizes['skills_per_employee']} skills...")
+        rows = write_csv(csv_path, seed=args.seed, **sizes)
+        start = time.perf_counter()
+        log = import_skills_csv(csv_path, imported_by='benchmark')
+        print(f"Imported {rows} rows in {time.perf_counter() - start:.1f} s ({log.status})")
+        unit_ids = scope_unit_ids()
+        statements = count_statements(db.engine)
+
+    client = app.test_client()
+    results = {url: measure_route(client, url, args.runs, statements) for url in role_routes(unit_ids)}
+
+    print(f"\n{'route':<55} {'median ms':>10} {'max ms':>10} {'queries':>8} {'peak KiB':>10}")
+    for url, result in results.items():
+        print(f"{url:<55} {result['median_ms']:>10} {result['max_ms']:>10} "
+              f"{result['queries']:>8} {result['peak_kib']:>10}")
+
+    os.remove(db_path)
+    os.remove(csv_path)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'sizes': sizes, 'routes': results}, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline yet; run with --update-baseline to store one.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['sizes'] != sizes:
+        print(f"\nBaseline was recorded with different sizes {baseline['sizes']}; not comparing.")
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print("   " + regression)
+        sys.exit(1)
+    print("\nNo regressions against baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Synthetic org data shaped like sample_data.csv.
+
+Every GDL, DH, DL and manager also appears as an employee (with 'N/A' for
+the levels they lead, as in the sample file), and each employee gets the
+same number of skill rows with random proficiencies and matching gap text.
+
+    python -m benchmarks.synthetic synthetic.csv --employees 100000 --skills-per-employee 20
+"""
+import argparse
+import csv
+import random
+
+CSV_HEADER = ['Name', 'NBK', 'Email', 'GDLName', 'DHName', 'DLName', 'MgrName',
+              'FunctionName', 'Role', 'PM/IC', 'SkillName', 'SkillType', 'EmpSkillCategory',
+              'User Proficiency', 'Expected Current Prof', 'GAP-Current',
+              'Expected Future Prof', 'GAP-Future']
+
+LEVEL_LABELS = {1: 'Novice', 2: 'Intermediate', 3: 'Expert', 4: 'Master'}
+SKILL_TYPES = ['Technical', 'Soft Skill', 'Management', 'Cognitive']
+SKILL_CATEGORIES = ['Core', 'Primary', 'Secondary', 'Other']
+FUNCTIONS = ['Corporate Litigation', 'Legal Research', 'Mergers & Acquisitions', 'Operations']
+NOT_SELECTED = 'Not Selected'
+
+DEFAULT_SIZES = {
+    'gdls': 2,
+    'dhs': 8,
+    'dls': 40,
+    'managers': 250,
+    'employees': 2000,
+    'skills_per_employee': 15,
+}
+
+
+def _level(value):
+    return f'Level {value}: {LEVEL_LABELS[value]}'
+
+
+def _skill_catalog(count):
+    return [(f'Skill {i:03d}', SKILL_TYPES[i % len(SKILL_TYPES)],
+             SKILL_CATEGORIES[i % len(SKILL_CATEGORIES)]) for i in range(count)]
+
+
+def _people(gdls, dhs, dls, managers, employees):
+    """
+    (name, nbk, role, gdl, dh, dl, manager) for everyone in the org, leaders first.
+    Each level is spread round-robin over the level above it.
+    """
+    gdl_names = [f'GDL {i}' for i in range(gdls)]
+    dh_parent = [gdl_names[i % gdls] for i in range(dhs)]
+    dh_names = [f'DH {i}' for i in range(dhs)]
+    dl_parent = [i % dhs for i in range(dls)]
+    dl_names = [f'DL {i}' for i in range(dls)]
+    manager_parent = [i % dls for i in range(managers)]
+    manager_names = [f'Manager {i}' for i in range(managers)]
+
+    for i, name in enumerate(gdl_names):
+        yield name, f'g{i:06d}', 'Group Delivery Lead', 'N/A', 'N/A', 'N/A', 'N/A'
+    for i, name in enumerate(dh_names):
+        yield name, f'h{i:06d}', 'Delivery Head', dh_parent[i], 'N/A', 'N/A', 'N/A'
+    for i, name in enumerate(dl_names):
+        dh = dl_parent[i]
+        yield name, f'l{i:06d}', 'Delivery Lead', dh_parent[dh], dh_names[dh], 'N/A', 'N/A'
+    for i, name in enumerate(manager_names):
+        dl = manager_parent[i]
+        dh = dl_parent[dl]
+        yield name, f'm{i:06d}', 'Manager', dh_parent[dh], dh_names[dh], dl_names[dl], 'N/A'
+    for i in range(employees):
+        manager = i % managers
+        dl = manager_parent[manager]
+        dh = dl_parent[dl]
+        yield (f'Employee {i}', f'e{i:07d}', 'Associate', dh_parent[dh], dh_names[dh],
+               dl_names[dl], manager_names[manager])
+
+
+def generate_rows(gdls, dhs, dls, managers, employees, skills_per_employee, seed=42):
+    """Yield CSV rows (lists in CSV_HEADER order) for a synthetic org."""
+    rng = random.Random(seed)
+    catalog = _skill_catalog(max(skills_per_employee * 3, 1))
+
+    for name, nbk, role, gdl, dh, dl, manager in _people(gdls, dhs, dls, managers, employees):
+        function = FUNCTIONS[rng.randrange(len(FUNCTIONS))]
+        person = [name, nbk, f'{nbk}@example.com', gdl, dh, dl, manager, function, role, 'IC']
+        for skill_name, skill_type, category in rng.sample(catalog, skills_per_employee):
+            user_level, expected_current = rng.randint(1, 4), rng.randint(1, 4)
+            current_gap = 'Under-Skilled' if expected_current > user_level else 'On-Target'
+            if rng.random() < 0.1:
+                expected_future, future_gap = NOT_SELECTED, NOT_SELECTED
+            else:
+                future_level = rng.randint(expected_current, 4)
+                expected_future = _level(future_level)
+                future_gap = 'Under-Skilled' if future_level > user_level else 'On-Target'
+            yield person + [skill_name, skill_type, category, _level(user_level),
+                            _level(expected_current), current_gap, expected_future, future_gap]
+
+
+def write_csv(path, seed=42, **sizes):
+    """Write a synthetic org CSV to path; sizes default to DEFAULT_SIZES. Returns the row count."""
+    sizes = {**DEFAULT_SIZES, **sizes}
+    count = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for row in generate_rows(seed=seed, **sizes):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def add_size_arguments(parser):
+    """Org size options shared by the benchmark scripts."""
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=default)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def size_arguments(args):
+    return {name: getattr(args, name) for name in DEFAULT_SIZES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    count = write_csv(args.path, seed=args.seed, **size_arguments(args))
+    print(f"Wrote {count} rows to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
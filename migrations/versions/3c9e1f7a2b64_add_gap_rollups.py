@@ -0,0 +1,58 @@
+"""add gap rollups
+
+Revision ID: 3c9e1f7a2b64
+Revises: 51105e039d9d
+Create Date: 2026-10-18 09:12:40.114802
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e1f7a2b64'
+down_revision = '51105e039d9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('gap_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('headcount', sa.Integer(), nullable=True),
+    sa.Column('total_skills', sa.Integer(), nullable=True),
+    sa.Column('current_gaps', sa.Integer(), nullable=True),
+    sa.Column('future_gaps', sa.Integer(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('level', 'name', name='uq_gap_rollups_level_name')
+    )
+
+    # Backfill from existing data so reports are correct before the next import
+    for level, column in (('manager', 'manager_name'), ('dl', 'dl_name'),
+                          ('dh', 'dh_name'), ('gdl', 'gdl_name')):
+        op.execute(f"""
+            INSERT INTO gap_rollups (level, name, headcount, total_skills, current_gaps, future_gaps, refreshed_at)
+            SELECT '{level}', e.{column}, COUNT(e.nbk),
+                   COALESCE(SUM(s.total_skills), 0),
+                   COALESCE(SUM(s.current_gaps), 0),
+                   COALESCE(SUM(s.future_gaps), 0),
+                   CURRENT_TIMESTAMP
+            FROM employees e
+            LEFT OUTER JOIN (
+                SELECT employee_nbk,
+                       COUNT(id) AS total_skills,
+                       SUM(CASE WHEN gap_current = 'Under-Skilled' THEN 1 ELSE 0 END) AS current_gaps,
+                       SUM(CASE WHEN gap_future = 'Under-Skilled' THEN 1 ELSE 0 END) AS future_gaps
+                FROM skills
+                GROUP BY employee_nbk
+            ) s ON s.employee_nbk = e.nbk
+            WHERE e.{column} IS NOT NULL AND e.{column} != 'N/A'
+            GROUP BY e.{column}
+        """)
+
+
+def downgrade():
+    op.drop_table('gap_rollups')
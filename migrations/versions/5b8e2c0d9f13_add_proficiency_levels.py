@@ -0,0 +1,115 @@
+"""add proficiency levels and gap severity
+
+Revision ID: 5b8e2c0d9f13
+Revises: c41a7e9d5f20
+Create Date: 2026-10-18 12:40:07.264519
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2c0d9f13'
+down_revision = 'c41a7e9d5f20'
+branch_labels = None
+depends_on = None
+
+
+LEVEL_SOURCES = {
+    'user_level': 'user_proficiency',
+    'expected_current_level': 'expected_current_prof',
+    'expected_future_level': 'expected_future_prof',
+}
+
+
+def _backfill_levels(bind):
+    """Parse each distinct proficiency string once and update matching rows."""
+    for level_column, text_column in LEVEL_SOURCES.items():
+        values = bind.execute(sa.text(f"SELECT DISTINCT {text_column} FROM skills")).scalars().all()
+        for value in values:
+            match = re.search(r'Level\s*(\d+)', value or '')
+            if match:
+                bind.execute(
+                    sa.text(f"UPDATE skills SET {level_column} = :level WHERE {text_column} = :value"),
+                    {'level': int(match.group(1)), 'value': value}
+                )
+
+    for horizon in ('current', 'future'):
+        op.execute(f"""
+            UPDATE skills SET gap_{horizon}_severity = CASE
+                WHEN expected_{horizon}_level IS NULL
+                    THEN CASE WHEN gap_{horizon} = 'Under-Skilled' THEN 1 ELSE 0 END
+                WHEN expected_{horizon}_level > COALESCE(user_level, 0)
+                    THEN expected_{horizon}_level - COALESCE(user_level, 0)
+                ELSE 0 END
+        """)
+
+
+def _rebuild_rollups():
+    op.execute("DELETE FROM gap_rollups")
+    for level, column in (('manager', 'manager_name'), ('dl', 'dl_name'),
+                          ('dh', 'dh_name'), ('gdl', 'gdl_name')):
+        op.execute(f"""
+            INSERT INTO gap_rollups (level, name, headcount, total_skills, current_gaps, future_gaps,
+                                     high_priority_gaps, medium_priority_gaps, low_priority_gaps, refreshed_at)
+            SELECT '{level}', e.{column}, COUNT(e.nbk),
+                   COALESCE(SUM(s.total_skills), 0),
+                   COALESCE(SUM(s.current_gaps), 0),
+                   COALESCE(SUM(s.future_gaps), 0),
+                   COALESCE(SUM(s.high_priority_gaps), 0),
+                   COALESCE(SUM(s.medium_priority_gaps), 0),
+                   COALESCE(SUM(s.low_priority_gaps), 0),
+                   CURRENT_TIMESTAMP
+            FROM employees e
+            LEFT OUTER JOIN (
+                SELECT employee_nbk,
+                       COUNT(*) AS total_skills,
+                       SUM(CASE WHEN gap_current_severity > 0 THEN 1 ELSE 0 END) AS current_gaps,
+                       SUM(CASE WHEN gap_future_severity > 0 THEN 1 ELSE 0 END) AS future_gaps,
+                       SUM(CASE WHEN gap_current_severity >= 3 THEN 1 ELSE 0 END) AS high_priority_gaps,
+                       SUM(CASE WHEN gap_current_severity = 2 THEN 1 ELSE 0 END) AS medium_priority_gaps,
+                       SUM(CASE WHEN gap_current_severity = 1 THEN 1 ELSE 0 END) AS low_priority_gaps
+                FROM skills
+                GROUP BY employee_nbk
+            ) s ON s.employee_nbk = e.nbk
+            WHERE e.{column} IS NOT NULL AND e.{column} != 'N/A'
+            GROUP BY e.{column}
+        """)
+
+
+def upgrade():
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_level', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('expected_current_level', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('expected_future_level', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('gap_current_severity', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('gap_future_severity', sa.SmallInteger(), nullable=True))
+        batch_op.drop_index('ix_skills_employee_gaps')
+        batch_op.create_index('ix_skills_employee_gaps', ['employee_nbk', 'gap_current_severity', 'gap_future_severity'], unique=False)
+
+    with op.batch_alter_table('gap_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('high_priority_gaps', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('medium_priority_gaps', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('low_priority_gaps', sa.Integer(), nullable=True))
+
+    _backfill_levels(op.get_bind())
+    _rebuild_rollups()
+
+
+def downgrade():
+    with op.batch_alter_table('gap_rollups', schema=None) as batch_op:
+        batch_op.drop_column('low_priority_gaps')
+        batch_op.drop_column('medium_priority_gaps')
+        batch_op.drop_column('high_priority_gaps')
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_skills_employee_gaps')
+        batch_op.create_index('ix_skills_employee_gaps', ['employee_nbk', 'gap_current', 'gap_future'], unique=False)
+        batch_op.drop_column('gap_future_severity')
+        batch_op.drop_column('gap_current_severity')
+        batch_op.drop_column('expected_future_level')
+        batch_op.drop_column('expected_current_level')
+        batch_op.drop_column('user_level')
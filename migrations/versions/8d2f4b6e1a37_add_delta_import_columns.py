@@ -0,0 +1,39 @@
+"""add delta import columns
+
+Revision ID: 8d2f4b6e1a37
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-18 10:02:15.538120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b6e1a37'
+down_revision = '3c9e1f7a2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows get no fingerprint; the first delta import rewrites them once
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_hash', sa.BigInteger(), nullable=True))
+
+    with op.batch_alter_table('data_import_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('mode', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('inserted_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('updated_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('deleted_count', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('data_import_logs', schema=None) as batch_op:
+        batch_op.drop_column('deleted_count')
+        batch_op.drop_column('updated_count')
+        batch_op.drop_column('inserted_count')
+        batch_op.drop_column('mode')
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.drop_column('row_hash')
@@ -0,0 +1,43 @@
+"""add scope trends
+
+Revision ID: 9c0758966c9f
+Revises: f2b7c9d4e6a1
+Create Date: 2026-10-18 18:09:00.322016
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c0758966c9f'
+down_revision = 'f2b7c9d4e6a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scope_trends',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('headcount', sa.Integer(), nullable=True),
+    sa.Column('total_skills', sa.Integer(), nullable=True),
+    sa.Column('current_gaps', sa.Integer(), nullable=True),
+    sa.Column('future_gaps', sa.Integer(), nullable=True),
+    sa.Column('high_priority_gaps', sa.Integer(), nullable=True),
+    sa.Column('plans_total', sa.Integer(), nullable=True),
+    sa.Column('plans_completed', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('level', 'name', 'snapshot_date', name='uq_scope_trends_level_name_date')
+    )
+    with op.batch_alter_table('scope_trends', schema=None) as batch_op:
+        batch_op.create_index('ix_scope_trends_snapshot_date', ['snapshot_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scope_trends', schema=None) as batch_op:
+        batch_op.drop_index('ix_scope_trends_snapshot_date')
+
+    op.drop_table('scope_trends')
@@ -0,0 +1,42 @@
+"""add jobs
+
+Revision ID: a9d4e2f7c6b3
+Revises: 0f6b9a2d4c81
+Create Date: 2026-10-18 15:47:26.093518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2f7c6b3'
+down_revision = '0f6b9a2d4c81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('scope_level', sa.String(length=20), nullable=False),
+    sa.Column('scope_name', sa.String(length=100), nullable=False),
+    sa.Column('data_version', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('artifact_path', sa.String(length=255), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_kind_scope_version', ['kind', 'scope_level', 'scope_name', 'data_version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_kind_scope_version')
+
+    op.drop_table('jobs')
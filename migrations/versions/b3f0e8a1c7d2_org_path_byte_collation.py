@@ -0,0 +1,37 @@
+"""org path byte collation
+
+Revision ID: b3f0e8a1c7d2
+Revises: 9c0758966c9f
+Create Date: 2026-10-18 19:05:41.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f0e8a1c7d2'
+down_revision = '9c0758966c9f'
+branch_labels = None
+depends_on = None
+
+# Tables whose path column holds org unit paths
+PATH_TABLES = ['org_units', 'search_documents']
+
+
+def upgrade():
+    # SQLite already compares text byte by byte; on PostgreSQL the type
+    # change also rebuilds the path indexes in the new collation
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in PATH_TABLES:
+        op.alter_column(table, 'path', existing_type=sa.String(length=255),
+                        type_=sa.String(length=255, collation='C'), existing_nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in PATH_TABLES:
+        op.alter_column(table, 'path', existing_type=sa.String(length=255, collation='C'),
+                        type_=sa.String(length=255), existing_nullable=False)
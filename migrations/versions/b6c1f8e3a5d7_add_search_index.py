@@ -0,0 +1,96 @@
+"""add search index
+
+Revision ID: b6c1f8e3a5d7
+Revises: a9d4e2f7c6b3
+Create Date: 2026-10-18 17:05:12.274630
+
+"""
+from collections import defaultdict
+import re
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6c1f8e3a5d7'
+down_revision = 'a9d4e2f7c6b3'
+branch_labels = None
+depends_on = None
+
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+def _trigrams(text):
+    grams = set()
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _pack(doc_ids):
+    return np.array(doc_ids, dtype='<i4').tobytes()
+
+
+def _backfill_search_index(bind):
+    """Index the employees already loaded, as app.search.rebuild_search_index does."""
+    people = bind.execute(sa.text(
+        "SELECT e.name, e.nbk, e.email, e.manager_name, COALESCE(u.path, '') AS path "
+        "FROM employees e LEFT JOIN org_units u ON u.id = e.org_unit_id"
+    )).all()
+    people.sort(key=lambda person: (person.path, person.nbk))
+
+    documents = []
+    postings = defaultdict(list)
+    manager_postings = defaultdict(list)
+    for doc_id, (name, nbk, email, manager_name, path) in enumerate(people, start=1):
+        documents.append({'id': doc_id, 'employee_nbk': nbk, 'path': path})
+        own_grams = _trigrams(' '.join(field for field in (name, nbk, email) if field))
+        for gram in own_grams:
+            postings[gram].append(doc_id)
+        if manager_name != 'N/A':
+            for gram in _trigrams(manager_name) - own_grams:
+                manager_postings[gram].append(doc_id)
+
+    if documents:
+        bind.execute(sa.text("INSERT INTO search_documents (id, employee_nbk, path) "
+                             "VALUES (:id, :employee_nbk, :path)"), documents)
+        bind.execute(sa.text("INSERT INTO search_postings (gram, doc_count, doc_ids, manager_doc_ids) "
+                             "VALUES (:gram, :doc_count, :doc_ids, :manager_doc_ids)"), [
+            {'gram': gram,
+             'doc_count': len(postings[gram]) + len(manager_postings[gram]),
+             'doc_ids': _pack(postings[gram]),
+             'manager_doc_ids': _pack(manager_postings[gram])}
+            for gram in postings.keys() | manager_postings.keys()
+        ])
+
+
+def upgrade():
+    op.create_table('search_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_nbk', sa.String(length=20), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_search_documents_path_id', ['path', 'id'], unique=False)
+
+    op.create_table('search_postings',
+    sa.Column('gram', sa.String(length=3), nullable=False),
+    sa.Column('doc_count', sa.Integer(), nullable=False),
+    sa.Column('doc_ids', sa.LargeBinary(), nullable=False),
+    sa.Column('manager_doc_ids', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('gram')
+    )
+
+    _backfill_search_index(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('search_postings')
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_documents_path_id')
+
+    op.drop_table('search_documents')
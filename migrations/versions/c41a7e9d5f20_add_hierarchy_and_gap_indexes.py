@@ -0,0 +1,58 @@
+"""add hierarchy and gap indexes
+
+Revision ID: c41a7e9d5f20
+Revises: 8d2f4b6e1a37
+Create Date: 2026-10-18 11:24:51.902317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a7e9d5f20'
+down_revision = '8d2f4b6e1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index('ix_employees_gdl_dh', ['gdl_name', 'dh_name'], unique=False)
+        batch_op.create_index('ix_employees_dh_dl_manager', ['dh_name', 'dl_name', 'manager_name'], unique=False)
+        batch_op.create_index('ix_employees_dl_manager', ['dl_name', 'manager_name'], unique=False)
+        batch_op.create_index('ix_employees_manager_name', ['manager_name'], unique=False)
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.create_index('ix_skills_employee_gaps', ['employee_nbk', 'gap_current', 'gap_future'], unique=False)
+        batch_op.create_index('ix_skills_employee_skill', ['employee_nbk', 'skill_name'], unique=False)
+
+    with op.batch_alter_table('training_plans', schema=None) as batch_op:
+        batch_op.create_index('ix_training_plans_employee_nbk', ['employee_nbk'], unique=False)
+
+    with op.batch_alter_table('milestones', schema=None) as batch_op:
+        batch_op.create_index('ix_milestones_training_plan_id', ['training_plan_id'], unique=False)
+
+    with op.batch_alter_table('feedbacks', schema=None) as batch_op:
+        batch_op.create_index('ix_feedbacks_employee_nbk', ['employee_nbk', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('feedbacks', schema=None) as batch_op:
+        batch_op.drop_index('ix_feedbacks_employee_nbk')
+
+    with op.batch_alter_table('milestones', schema=None) as batch_op:
+        batch_op.drop_index('ix_milestones_training_plan_id')
+
+    with op.batch_alter_table('training_plans', schema=None) as batch_op:
+        batch_op.drop_index('ix_training_plans_employee_nbk')
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_skills_employee_skill')
+        batch_op.drop_index('ix_skills_employee_gaps')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_manager_name')
+        batch_op.drop_index('ix_employees_dl_manager')
+        batch_op.drop_index('ix_employees_dh_dl_manager')
+        batch_op.drop_index('ix_employees_gdl_dh')
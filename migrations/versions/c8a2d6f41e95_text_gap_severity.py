@@ -0,0 +1,37 @@
+"""severity for text-only gaps
+
+Revision ID: c8a2d6f41e95
+Revises: b3f0e8a1c7d2
+Create Date: 2026-10-18 19:42:17.530284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a2d6f41e95'
+down_revision = 'b3f0e8a1c7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Skills without an expected level get the severity their gap text implies,
+    # as app.proficiency.apply_levels_and_gaps now assigns on import. Their
+    # fingerprint is cleared so the next import rewrites them and rebuilds
+    # rollups, history and trends; the version bump drops cached pages and
+    # snapshots built from the old severities.
+    for horizon in ('current', 'future'):
+        op.execute(f"""
+            UPDATE skills SET gap_{horizon}_severity =
+                CASE WHEN gap_{horizon} = 'Under-Skilled' THEN 1 ELSE 0 END,
+                row_hash = NULL
+            WHERE expected_{horizon}_level IS NULL
+        """)
+    op.execute("UPDATE data_versions SET version = version + 1")
+
+
+def downgrade():
+    for horizon in ('current', 'future'):
+        op.execute(f"UPDATE skills SET gap_{horizon}_severity = NULL WHERE expected_{horizon}_level IS NULL")
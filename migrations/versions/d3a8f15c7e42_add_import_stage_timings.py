@@ -0,0 +1,26 @@
+"""add import stage timings
+
+Revision ID: d3a8f15c7e42
+Revises: b6c1f8e3a5d7
+Create Date: 2026-10-18 18:12:40.415302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f15c7e42'
+down_revision = 'b6c1f8e3a5d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('data_import_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('data_import_logs', schema=None) as batch_op:
+        batch_op.drop_column('stage_timings')
@@ -0,0 +1,95 @@
+"""add org units
+
+Revision ID: e7a3d1c5b290
+Revises: 5b8e2c0d9f13
+Create Date: 2026-10-18 13:52:31.418806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3d1c5b290'
+down_revision = '5b8e2c0d9f13'
+branch_labels = None
+depends_on = None
+
+
+LEVELS = ['gdl', 'dh', 'dl', 'manager']
+NAME_COLUMNS = ['gdl_name', 'dh_name', 'dl_name', 'manager_name']
+
+employees = sa.table('employees', *[sa.column(name) for name in NAME_COLUMNS + ['org_unit_id']])
+
+
+def _backfill_org_units(bind):
+    """Build the unit tree from the distinct hierarchy tuples and link employees to it."""
+    combos = bind.execute(sa.text(
+        "SELECT DISTINCT gdl_name, dh_name, dl_name, manager_name FROM employees"
+    )).all()
+
+    unit_ids = {}
+    unit_paths = {}
+    for combo in combos:
+        names = ()
+        for level, name in zip(LEVELS, combo):
+            if not name or name == 'N/A':
+                break
+            parent = names
+            names += (name,)
+            if names in unit_ids:
+                continue
+            unit_id = len(unit_ids) + 1
+            unit_ids[names] = unit_id
+            unit_paths[names] = (unit_paths[parent] if parent else '/') + f'{unit_id}/'
+            bind.execute(
+                sa.text("INSERT INTO org_units (id, level, name, parent_id, path) "
+                        "VALUES (:id, :level, :name, :parent_id, :path)"),
+                {'id': unit_id, 'level': level, 'name': name,
+                 'parent_id': unit_ids.get(parent), 'path': unit_paths[names]}
+            )
+
+        if names:
+            bind.execute(
+                employees.update().where(*[
+                    employees.c[column].is_not_distinct_from(value)
+                    for column, value in zip(NAME_COLUMNS, combo)
+                ]).values(org_unit_id=unit_ids[names])
+            )
+
+
+def upgrade():
+    op.create_table('org_units',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['parent_id'], ['org_units.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('org_units', schema=None) as batch_op:
+        batch_op.create_index('ix_org_units_level_name', ['level', 'name'], unique=False)
+        batch_op.create_index('ix_org_units_parent_id', ['parent_id'], unique=False)
+        batch_op.create_index('ix_org_units_path', ['path'], unique=True)
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('org_unit_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_employees_org_unit_id', ['org_unit_id'], unique=False)
+        batch_op.create_foreign_key('fk_employees_org_unit_id', 'org_units', ['org_unit_id'], ['id'])
+
+    _backfill_org_units(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_employees_org_unit_id', type_='foreignkey')
+        batch_op.drop_index('ix_employees_org_unit_id')
+        batch_op.drop_column('org_unit_id')
+
+    with op.batch_alter_table('org_units', schema=None) as batch_op:
+        batch_op.drop_index('ix_org_units_path')
+        batch_op.drop_index('ix_org_units_parent_id')
+        batch_op.drop_index('ix_org_units_level_name')
+
+    op.drop_table('org_units')
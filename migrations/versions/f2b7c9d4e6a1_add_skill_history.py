@@ -0,0 +1,80 @@
+"""add skill history
+
+Revision ID: f2b7c9d4e6a1
+Revises: d3a8f15c7e42
+Create Date: 2026-10-18 18:40:03.918255
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c9d4e6a1'
+down_revision = 'd3a8f15c7e42'
+branch_labels = None
+depends_on = None
+
+
+def _backfill_skill_history(bind):
+    """
+    Record the skills already loaded as today's state, as the first
+    app.history.record_skill_history run would: one key and one history row
+    per (employee, skill), the oldest row winning over legacy duplicates.
+    """
+    bind.execute(sa.text(
+        "INSERT INTO skill_keys (employee_nbk, skill_name, user_level, gap_current_severity, "
+        "gap_future_severity, active) "
+        "SELECT s.employee_nbk, s.skill_name, s.user_level, "
+        "CASE WHEN s.gap_current_severity > 0 THEN s.gap_current_severity ELSE 0 END, "
+        "CASE WHEN s.gap_future_severity > 0 THEN s.gap_future_severity ELSE 0 END, 1 "
+        "FROM skills s JOIN employees e ON e.nbk = s.employee_nbk "
+        "WHERE s.id IN (SELECT MIN(id) FROM skills WHERE skill_name IS NOT NULL "
+        "GROUP BY employee_nbk, skill_name)"
+    ))
+    bind.execute(sa.text(
+        "INSERT INTO skill_history (key_id, snapshot_date, user_level, gap_current_severity, "
+        "gap_future_severity, gap_delta, future_gap_delta) "
+        "SELECT id, :snapshot_date, user_level, gap_current_severity, gap_future_severity, "
+        "CASE WHEN gap_current_severity > 0 THEN 1 ELSE 0 END, "
+        "CASE WHEN gap_future_severity > 0 THEN 1 ELSE 0 END "
+        "FROM skill_keys"
+    ), {'snapshot_date': datetime.utcnow().date().isoformat()})
+
+
+def upgrade():
+    op.create_table('skill_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_nbk', sa.String(length=20), nullable=False),
+    sa.Column('skill_name', sa.String(length=100), nullable=False),
+    sa.Column('user_level', sa.SmallInteger(), nullable=True),
+    sa.Column('gap_current_severity', sa.SmallInteger(), nullable=True),
+    sa.Column('gap_future_severity', sa.SmallInteger(), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_nbk', 'skill_name', name='uq_skill_keys_employee_skill')
+    )
+    op.create_table('skill_history',
+    sa.Column('key_id', sa.Integer(), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('user_level', sa.SmallInteger(), nullable=True),
+    sa.Column('gap_current_severity', sa.SmallInteger(), nullable=True),
+    sa.Column('gap_future_severity', sa.SmallInteger(), nullable=True),
+    sa.Column('gap_delta', sa.SmallInteger(), nullable=False),
+    sa.Column('future_gap_delta', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['key_id'], ['skill_keys.id'], ),
+    sa.PrimaryKeyConstraint('key_id', 'snapshot_date')
+    )
+    with op.batch_alter_table('skill_history', schema=None) as batch_op:
+        batch_op.create_index('ix_skill_history_snapshot_date', ['snapshot_date'], unique=False)
+
+    _backfill_skill_history(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table('skill_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_skill_history_snapshot_date')
+
+    op.drop_table('skill_history')
+    op.drop_table('skill_keys')
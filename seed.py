@@ -1,6 +1,8 @@
 import pandas as pd
 from app import create_app, db
-from app.models import Employee, Skill, TrainingResource
+from app.models import TrainingResource
+from app.importer import import_skills_csv
+from app.data_version import bump_data_version
 import os
 
 app = create_app()
@@ -19,59 +21,18 @@ def seed_data():
             print(f"Error: {csv_path} not found.")
             return
 
-        df = pd.read_csv(csv_path)
-        print(f"Loaded {len(df)} rows from sample_data.csv")
-
-        # Create Employees (Unique)
-        # Assuming one row per employee-skill combo, so we need to deduplicate employees
-        employees_df = df.drop_duplicates(subset=['NBK'])
-        
-        for _, row in employees_df.iterrows():
-            employee = Employee(
-                nbk=row['NBK'],
-                name=row['Name'],
-                email=row['Email'],
-                role=row['Role'],
-                function_name=row['FunctionName'],
-                pm_ic=row['PM/IC'],
-                manager_name=row['MgrName'],
-                dl_name=row['DLName'],
-                dh_name=row['DHName'],
-                gdl_name=row['GDLName']
-            )
-            # Check if exists
-            existing = Employee.query.get(row['NBK'])
-            if not existing:
-                db.session.add(employee)
-            else:
-                # Update?
-                pass
-        
-        db.session.commit()
-        print("Employees seeded.")
-
-        # Create Skills
-        for _, row in df.iterrows():
-            skill = Skill(
-                employee_nbk=row['NBK'],
-                skill_name=row['SkillName'],
-                skill_type=row['SkillType'],
-                emp_skill_category=row['EmpSkillCategory'],
-                user_proficiency=row['User Proficiency'],
-                expected_current_prof=row['Expected Current Prof'],
-                gap_current=row['GAP-Current'],
-                expected_future_prof=row['Expected Future Prof'],
-                gap_future=row['GAP-Future']
-            )
-            db.session.add(skill)
-        
-        db.session.commit()
-        print("Skills seeded.")
+        # Stream employees and skills in bulk chunks (see app.importer)
+        log = import_skills_csv(csv_path, imported_by='seed.py')
+        print(f"Imported {log.row_count} rows from sample_data.csv ({log.status})")
+        if log.error_message:
+            print(f"Error: {log.error_message}")
 
         # Load sample_trainings.csv
         trainings_csv_path = os.path.join(base_dir, 'sample_trainings.csv')
         if os.path.exists(trainings_csv_path):
             df_trainings = pd.read_csv(trainings_csv_path)
+            # The header has spaces after its commas (" New to Role")
+            df_trainings.columns = df_trainings.columns.str.strip()
             print(f"Loaded {len(df_trainings)} rows from sample_trainings.csv")
 
             for _, row in df_trainings.iterrows():
@@ -97,6 +58,8 @@ def seed_data():
                         db.session.add(resource)
             
             db.session.commit()
+            # Catalogue indexes and cached pages are keyed on the data version
+            bump_data_version()
             print("Training resources seeded.")
         else:
             print("sample_trainings.csv not found, skipping training resources.")